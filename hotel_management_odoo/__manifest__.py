@@ -21,7 +21,7 @@
 ###############################################################################
 {
     'name': 'Hotel Management',
-    'version': '18.0.1.1.1',
+    'version': '18.0.1.3.0',
     'category': 'Industries',
     'summary': """A complete Hotel Management System that cover all areas of 
      Hotel services""" ,
@@ -38,15 +38,20 @@
         'security/hotel_management_odoo_security.xml',
         'security/ir.model.access.csv',
         'data/ir_data_sequence.xml',
+        'data/hotel_room_occupancy_data.xml',
+        'data/hotel_room_type_inventory_data.xml',
+        'data/ir_cron_data.xml',
         'views/account_move_views.xml',
         'views/hotel_menu_views.xml',
         'views/hotel_amenity_views.xml',
         'views/hotel_service_views.xml',
         'views/hotel_floor_views.xml',
         'views/hotel_room_type_views.xml',
+        'views/hotel_rate_plan_views.xml',
         'views/hotel_room_views.xml',
         'views/lunch_product_views.xml',
         'views/fleet_vehicle_model_views.xml',
+        'views/event_event_views.xml',
         'views/room_booking_views.xml',
         'views/maintenance_team_views.xml',
         'views/maintenance_request_views.xml',
@@ -54,8 +59,13 @@
         'views/cleaning_request_views.xml',
         'views/food_booking_line_views.xml',
         'views/dashboard_view.xml',
+        'views/hotel_room_occupancy_views.xml',
+        'views/hotel_room_type_inventory_views.xml',
+        'views/hotel_report_job_views.xml',
+        'views/hotel_booking_import_views.xml',
         'wizard/room_booking_detail_views.xml',
         'wizard/sale_order_detail_views.xml',
+        'wizard/room_assignment_views.xml',
         'views/reporting_views.xml',
         'report/room_booking_reports.xml',
         'report/sale_order_reports.xml',
@@ -66,6 +76,8 @@
             'hotel_management_odoo/static/src/css/dashboard.css',
             'hotel_management_odoo/static/src/js/dashboard_action.js',
             'hotel_management_odoo/static/src/xml/dashboard_templates.xml',
+            'hotel_management_odoo/static/src/js/kitchen_display.js',
+            'hotel_management_odoo/static/src/xml/kitchen_display_templates.xml',
         ],
     },
     'images': ['static/description/banner.jpg'],
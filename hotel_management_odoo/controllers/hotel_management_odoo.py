@@ -20,22 +20,33 @@
 #
 ###############################################################################
 import json
+import tempfile
+from werkzeug.wsgi import wrap_file
 from odoo import http
-from odoo.http import content_disposition, request
+from odoo.http import content_disposition, request, Response
 from odoo.tools import html_escape
 
+# Size of the chunks in which generated reports are streamed back
+XLSX_CHUNK_SIZE = 64 * 1024
+
 
 class XLSXReportController(http.Controller):
     """Controller for XlsX report"""
 
     @http.route('/xlsx_reports', type='http', auth='user',
                 methods=['POST'], csrf=False)
-    def get_room_booking_report_xlsx(self, model, options, output_format,
-                                     report_name):
-        """Function for generating xlsx report"""
-        report_obj = request.env[model].sudo()
-        options = json.loads(options)
+    def get_room_booking_report_xlsx(self, model, output_format, report_name,
+                                     options=None, wizard_id=None):
+        """Function for generating xlsx report. When the id of the report
+        wizard is given, the report data is queried again on the server
+        and streamed from a temporary file instead of being posted back
+        by the client."""
         try:
+            if output_format == 'xlsx' and wizard_id:
+                return self._stream_xlsx_report(model, int(wizard_id),
+                                                report_name)
+            report_obj = request.env[model].sudo()
+            options = json.loads(options)
             if output_format == 'xlsx':
                 response = request.make_response(
                     None,
@@ -54,3 +65,27 @@ class XLSXReportController(http.Controller):
                 'data': s_error
             }
             return request.make_response(html_escape(json.dumps(error)))
+
+    def _stream_xlsx_report(self, model, wizard_id, report_name):
+        """Writes the report of the wizard in a temporary file and returns
+        a response streaming it in chunks"""
+        wizard = request.env[model].browse(wizard_id).exists()
+        if not wizard or not hasattr(wizard, '_write_xlsx_report'):
+            raise request.not_found()
+        report = tempfile.TemporaryFile()
+        try:
+            wizard._write_xlsx_report(report)
+            size = report.tell()
+            report.seek(0)
+        except Exception:
+            report.close()
+            raise
+        response = Response(
+            wrap_file(request.httprequest.environ, report, XLSX_CHUNK_SIZE),
+            headers=[('Content-Type', 'application/vnd.ms-excel'),
+                     ('Content-Length', size),
+                     ('Content-Disposition',
+                      content_disposition(report_name + '.xlsx'))],
+            direct_passthrough=True)
+        response.set_cookie('fileToken', 'dummy token')
+        return response
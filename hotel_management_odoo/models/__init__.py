@@ -24,13 +24,24 @@ from . import account_move_line
 from . import cleaning_request
 from . import cleaning_team
 from . import event_booking_line
+from . import event_event
 from . import fleet_booking_line
 from . import fleet_vehicle_model
 from . import food_booking_line
 from . import hotel_amenity
+from . import hotel_booking_import
+from . import hotel_booking_line_mixin
+from . import hotel_dashboard
 from . import hotel_floor
+from . import hotel_kpi_snapshot
+from . import hotel_rate_plan
+from . import hotel_report_job
 from . import hotel_room
+from . import hotel_room_occupancy
+from . import hotel_room_type_inventory
 from . import hotel_service
+from . import ir_sequence
+from . import ir_websocket
 from . import maintenance_request
 from . import maintenance_team
 from . import room_booking
@@ -21,6 +21,10 @@
 ###############################################################################
 from odoo import fields, models
 
+# Fields of the invoices the revenue tiles of the hotel dashboard depend on
+DASHBOARD_FIELDS = {'hotel_booking_id', 'state', 'date', 'currency_id',
+                    'line_ids', 'invoice_line_ids', 'payment_state'}
+
 
 class AccountMove(models.Model):
     """Inherited account. move for adding hotel booking reference field to
@@ -29,5 +33,28 @@ class AccountMove(models.Model):
 
     hotel_booking_id = fields.Many2one('room.booking',
                                        string="Booking Reference",
-                                       readonly=True, help="Choose the Booking"
-                                                           "Reference")
+                                       readonly=True, index='btree_not_null',
+                                       help="Choose the Booking"
+                                            "Reference")
+
+    def write(self, vals):
+        """Refresh the revenue tiles of the hotel dashboard when the
+        amounts or the state of a hotel invoice change"""
+        if not DASHBOARD_FIELDS.isdisjoint(vals) and (
+                vals.get('hotel_booking_id')
+                or self.filtered('hotel_booking_id')):
+            self.env['hotel.dashboard']._invalidate_cache()
+        return super().write(vals)
+
+    def _compute_payment_state(self):
+        """Payments are reconciled without writing on the invoice, refresh
+        the revenue tiles of the hotel dashboard from here as well when
+        the payment state of a hotel invoice changes"""
+        hotel_moves = self.filtered('hotel_booking_id')
+        previous = {move: move.env.cache.get(
+            move, self._fields['payment_state'], None)
+            for move in hotel_moves}
+        super()._compute_payment_state()
+        if any(move.payment_state != state
+               for move, state in previous.items()):
+            self.env['hotel.dashboard']._invalidate_cache()
@@ -32,3 +32,10 @@ class AccountMoveLine(models.Model):
                                      ('fleet', 'Fleet')],
                                     string="Product Type",
                                     help="Choose the product type")
+    hotel_line_ref = fields.Reference(
+        [('room.booking.line', 'Room'), ('food.booking.line', 'Food'),
+         ('event.booking.line', 'Event'),
+         ('service.booking.line', 'Service'),
+         ('fleet.booking.line', 'Fleet')],
+        string="Booking Line", readonly=True, copy=False,
+        help="Booking line invoiced by the invoice line")
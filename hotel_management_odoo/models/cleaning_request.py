@@ -19,9 +19,29 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 ###############################################################################
+from collections import defaultdict
 from odoo import api, fields, models, _
 from odoo.exceptions import ValidationError
 
+# Estimated minutes of the requests that are not about a room
+DEFAULT_CLEANING_EFFORT = 30.0
+# Minutes lost by a housekeeper moving to a floor not yet in their queue
+FLOOR_CHANGE_EFFORT = 10.0
+# Requests not started yet, moved between the members by the balancer
+BALANCED_STATES = ('draft', 'assign')
+# Requests in progress, kept by their member and counted in their queue
+BUSY_STATES = ('ongoing', 'support')
+
+
+def _queue_cost(queue, floor_id, effort):
+    """Cost of adding a request to the queue of a member, given as
+    [minutes, floor ids]: the queue length once the request is added,
+    plus the time to reach the floor when the queue is elsewhere"""
+    minutes, floor_ids = queue
+    if floor_id and floor_ids and floor_id not in floor_ids:
+        minutes += FLOOR_CHANGE_EFFORT
+    return minutes + effort
+
 
 class CleaningRequest(models.Model):
     """Class for creating and assigning Cleaning Request"""
@@ -71,15 +91,142 @@ class CleaningRequest(models.Model):
     domain_partner_ids = fields.Many2many('res.partner',
                                           string="Domain Partner",
                                           help="Choose the Domain Partner")
+    booking_id = fields.Many2one('room.booking', string="Booking",
+                                 readonly=True, copy=False,
+                                 index='btree_not_null',
+                                 ondelete='set null',
+                                 help="Booking whose checkout vacated the "
+                                      "room")
+    effort = fields.Float(string="Effort (min)",
+                          compute='_compute_effort', store=True,
+                          help="Estimated minutes needed for the cleaning, "
+                               "from the type of the room")
 
-    @api.model
+    @api.depends('cleaning_type', 'room_id.room_type.cleaning_effort')
+    def _compute_effort(self):
+        """Estimated minutes of the cleaning"""
+        for request in self:
+            if request.cleaning_type == 'room' \
+                    and request.room_id.room_type:
+                request.effort = request.room_id.room_type.cleaning_effort
+            else:
+                request.effort = DEFAULT_CLEANING_EFFORT
+
+    @api.model_create_multi
     def create(self, vals_list):
-        """Sequence Generation"""
-        if vals_list.get('sequence', 'New') == 'New':
-            vals_list['sequence'] = self.env['ir.sequence'].next_by_code(
-                'cleaning.request')
+        """Sequence Generation, the sequences of all the new requests are
+        taken from the sequence in one block"""
+        unnamed = [vals for vals in vals_list
+                   if vals.get('sequence', 'New') == 'New']
+        sequences = self.env['ir.sequence']._next_block_by_code(
+            'cleaning.request', len(unnamed))
+        for vals, sequence in zip(unnamed, sequences):
+            vals['sequence'] = sequence
         return super().create(vals_list)
 
+    @api.model
+    def _create_checkout_requests(self, lines):
+        """Creates at once the cleaning requests of the rooms vacated by
+        the room booking lines, routed to the team of their floor. Rooms
+        that already wait for a cleaning get no second request.
+        :return: cleaning.request recordset"""
+        rooms = lines.room_id
+        if not rooms:
+            return self.browse()
+        pending = set(self.search([
+            ('cleaning_type', '=', 'room'),
+            ('room_id', 'in', rooms.ids),
+            ('state', '!=', 'done'),
+        ]).room_id.ids)
+        routing, default_team = self.env[
+            'cleaning.team']._get_floor_routing()
+        vals_list = []
+        for line in lines:
+            room = line.room_id
+            team = routing.get(room.floor_id.id, default_team)
+            if not room or room.id in pending or not team:
+                continue
+            pending.add(room.id)
+            vals_list.append({
+                'cleaning_type': 'room',
+                'room_id': room.id,
+                'team_id': team.id,
+                'booking_id': line.booking_id.id,
+                'description': _("Checkout of %s", line.booking_id.name),
+            })
+        requests = self.create(vals_list)
+        requests._balance_workload()
+        return requests
+
+    def _balance_workload(self):
+        """Assigns the requests not started yet to the members of their
+        team. The requests of other members already in the queues are kept
+        as they are. Each team is solved greedily, largest effort first:
+        a request goes to the member whose queue stays the shortest,
+        counting the time to reach its floor, so that members keep to
+        few floors.
+        :return: number of requests whose member changed"""
+        movable = self.filtered(lambda request: request.team_id.member_ids
+                                and request.state in BALANCED_STATES)
+        if not movable:
+            return 0
+        queues = {}
+        for team in movable.team_id:
+            for member in team.member_ids:
+                queues[team.id, member.id] = [0.0, set()]
+        for request in self.search([
+                ('team_id', 'in', movable.team_id.ids),
+                ('assigned_id', '!=', False),
+                ('state', 'in', BALANCED_STATES + BUSY_STATES),
+                ('id', 'not in', movable.ids)]):
+            queue = queues.get((request.team_id.id, request.assigned_id.id))
+            if queue:
+                queue[0] += request.effort
+                if request.room_id.floor_id:
+                    queue[1].add(request.room_id.floor_id.id)
+        changes = defaultdict(list)
+        for request in movable.sorted(lambda request: (
+                -request.effort, request.room_id.floor_id.id or 0,
+                request.id)):
+            floor_id = request.room_id.floor_id.id
+            member_id = min(
+                request.team_id.member_ids.ids,
+                key=lambda member_id: (_queue_cost(
+                    queues[request.team_id.id, member_id], floor_id,
+                    request.effort), member_id))
+            queue = queues[request.team_id.id, member_id]
+            queue[0] = _queue_cost(queue, floor_id, request.effort)
+            if floor_id:
+                queue[1].add(floor_id)
+            if request.assigned_id.id != member_id \
+                    or request.state != 'assign':
+                changes[member_id].append(request.id)
+        for member_id, request_ids in changes.items():
+            self.browse(request_ids).write({'assigned_id': member_id,
+                                            'state': 'assign'})
+        return sum(len(request_ids) for request_ids in changes.values())
+
+    def action_balance_workload(self):
+        """Balances the selected requests, or all the requests not
+        started yet when none is selected"""
+        requests = self or self.search([('state', 'in', BALANCED_STATES)])
+        count = requests._balance_workload()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'type': 'success',
+                'message': _("%s cleaning requests were (re)assigned.",
+                             count),
+                'next': {'type': 'ir.actions.act_window_close'},
+            }
+        }
+
+    @api.model
+    def _cron_balance_workload(self):
+        """Rebalances all the requests not started yet"""
+        self.search([('state', 'in', BALANCED_STATES)])._balance_workload()
+
     @api.onchange('team_id')
     def _onchange_team_id(self):
         """Function for updating the domain partner ids"""
@@ -19,7 +19,7 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 ###############################################################################
-from odoo import fields, models
+from odoo import api, fields, models
 
 
 class CleaningTeam(models.Model):
@@ -41,3 +41,21 @@ class CleaningTeam(models.Model):
                                           'hotel_management_odoo.'
                                           'cleaning_team_group_user').id)],
                                   help="Team Members")
+    floor_ids = fields.Many2many('hotel.floor', string="Floors",
+                                 help="Floors whose rooms are cleaned by the "
+                                      "team after checkout, teams without "
+                                      "floor take the other rooms")
+
+    @api.model
+    def _get_floor_routing(self):
+        """Returns the team of each floor and the team of the rooms of
+        the floors without team, so that the requests of a checkout are
+        routed without one search per room
+        :return: tuple of ({floor id: team}, default team)"""
+        teams = self.search([], order='id')
+        routing = {}
+        for team in teams:
+            for floor in team.floor_ids:
+                routing.setdefault(floor.id, team)
+        default = teams.filtered(lambda team: not team.floor_ids)[:1]
+        return routing, default or teams[:1]
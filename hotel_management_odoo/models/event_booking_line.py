@@ -19,13 +19,17 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 ###############################################################################
-from odoo import api, fields, models
+from collections import defaultdict
+from odoo import api, fields, models, _
+from odoo.exceptions import ValidationError
+from odoo.tools import float_round
 
 
 class EventBookingLine(models.Model):
     """Model that handles the event booking form"""
     _name = "event.booking.line"
     _description = "Hotel Event Line"
+    _inherit = "hotel.booking.line.mixin"
     _rec_name = 'event_id'
 
     booking_id = fields.Many2one("room.booking", string="Booking",
@@ -76,34 +80,48 @@ class EventBookingLine(models.Model):
                              string="Order Status",
                              help="State of Room Booking", copy=False)
 
-    @api.depends('uom_qty', 'price_unit', 'tax_ids')
-    def _compute_price_subtotal(self):
-        """Compute the amounts of the room booking line."""
-        for line in self:
-            base_line = line._prepare_base_line_for_taxes_computation()
-            self.env['account.tax']._add_tax_details_in_base_line(base_line, self.env.company)
-            line.price_subtotal = base_line['tax_details']['total_excluded_currency']
-            line.price_total = base_line['tax_details']['total_included_currency']
-            line.price_tax = line.price_total - line.price_subtotal
-            if self.env.context.get('import_file',
-                                    False) and not self.env.user. \
-                    user_has_groups('account.group_account_manager'):
-                line.tax_id.invalidate_recordset(
-                    ['invoice_repartition_line_ids'])
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Takes the seats of the new lines from the events"""
+        lines = super().create(vals_list)
+        self.env['event.event']._allocate_hotel_seats(
+            lines._get_seat_quantities())
+        return lines
+
+    def write(self, vals):
+        """Moves the seats of the lines when their event, quantity or
+        booking change"""
+        if not {'event_id', 'uom_qty', 'booking_id'} & set(vals):
+            return super().write(vals)
+        quantities = self._get_seat_quantities(sign=-1)
+        res = super().write(vals)
+        for event_id, quantity in self._get_seat_quantities().items():
+            quantities[event_id] += quantity
+        self.env['event.event']._allocate_hotel_seats(quantities)
+        return res
 
-    def _prepare_base_line_for_taxes_computation(self):
-        """ Convert the current record to a dictionary in order to use the generic taxes computation method
-        defined on account.tax.
+    def unlink(self):
+        """Gives the seats of the lines back to the events"""
+        quantities = self._get_seat_quantities(sign=-1)
+        res = super().unlink()
+        self.env['event.event']._allocate_hotel_seats(quantities)
+        return res
 
-        :return: A python dictionary.
-        """
-        self.ensure_one()
-        return self.env['account.tax']._prepare_base_line_for_taxes_computation(
-            self,
-            **{
-                'tax_ids': self.tax_ids,
-                'quantity': self.uom_qty,
-                'partner_id': self.booking_id.partner_id,
-                'currency_id': self.currency_id,
-            },
-        )
\ No newline at end of file
+    @api.constrains('uom_qty')
+    def _check_uom_qty(self):
+        """Tickets are sold by whole seats"""
+        for line in self:
+            if line.uom_qty <= 0 or line.uom_qty != int(line.uom_qty):
+                raise ValidationError(_(
+                    "The quantity of tickets must be a positive whole "
+                    "number."))
+
+    def _get_seat_quantities(self, sign=1):
+        """Seats taken by the lines per event, the lines of cancelled
+        bookings do not take any seat"""
+        quantities = defaultdict(int)
+        for line in self:
+            if line.event_id and line.booking_id.state != 'cancel':
+                quantities[line.event_id.id] += sign * int(float_round(
+                    line.uom_qty, precision_digits=0))
+        return quantities
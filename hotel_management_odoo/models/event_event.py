@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: ADARSH K (odoo@cybrosys.com)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from odoo import api, fields, models, _
+from odoo.exceptions import ValidationError
+from .hotel_room_type_inventory import INVENTORY_LOCK_TIMEOUT
+
+
+class EventEvent(models.Model):
+    """Seats of the events sold with the hotel bookings"""
+    _inherit = 'event.event'
+
+    date_end = fields.Datetime(index=True)
+    hotel_seats_reserved = fields.Integer(
+        string="Hotel Seats", readonly=True, copy=False, default=0,
+        help="Seats taken by the event lines of the hotel bookings")
+    hotel_seats_available = fields.Integer(
+        string="Seats Left for the Hotel",
+        compute='_compute_hotel_seats_available',
+        help="Seats that can still be sold with the hotel bookings")
+
+    @api.depends('seats_max', 'seats_limited', 'seats_reserved',
+                 'seats_used', 'hotel_seats_reserved')
+    def _compute_hotel_seats_available(self):
+        """Seats left once the registrations and the hotel seats are
+        taken, zero for events without limit"""
+        for event in self:
+            event.hotel_seats_available = max(
+                event.seats_max - event.seats_reserved - event.seats_used
+                - event.hotel_seats_reserved, 0) if event.seats_limited else 0
+
+    @api.model
+    def _allocate_hotel_seats(self, quantities):
+        """Adds the quantities to the hotel seat counters, raising when an
+        event has not enough seats left. The counters are locked in event
+        order and only for a short time: an allocation waiting longer, or
+        conflicting with a concurrent commit, fails with a concurrency
+        error and its request is replayed.
+        :param quantities: dictionary of {event id: seats}, the seats being
+            negative to give them back"""
+        quantities = {event_id: quantity
+                      for event_id, quantity in quantities.items() if quantity}
+        if not quantities:
+            return
+        events = self.browse(sorted(quantities))
+        values = ", ".join(["(%s, %s, %s)"] * len(events))
+        params = [param for event in events for param in (
+            event.id, quantities[event.id],
+            event.seats_reserved + event.seats_used)]
+        self.flush_model(['seats_limited', 'seats_max',
+                          'hotel_seats_reserved'])
+        self.env.cr.execute("SET LOCAL lock_timeout = %s",
+                            [INVENTORY_LOCK_TIMEOUT])
+        self.env.cr.execute("""
+            SELECT id FROM event_event
+             WHERE id = ANY(%s)
+             ORDER BY id
+               FOR UPDATE
+        """, [events.ids])
+        self.env.cr.execute("""
+            UPDATE event_event event
+               SET hotel_seats_reserved = event.hotel_seats_reserved
+                                          + seat.quantity
+              FROM (VALUES %s) AS seat(event_id, quantity, taken)
+             WHERE event.id = seat.event_id
+               AND (seat.quantity < 0
+                    OR NOT COALESCE(event.seats_limited, FALSE)
+                    OR event.hotel_seats_reserved + seat.quantity
+                       + seat.taken <= event.seats_max)
+         RETURNING event.id
+        """ % values, params)
+        updated = {row[0] for row in self.env.cr.fetchall()}
+        self.env.cr.execute("SET LOCAL lock_timeout TO DEFAULT")
+        self.invalidate_model(['hotel_seats_reserved',
+                               'hotel_seats_available'])
+        full = events.filtered(lambda event: event.id not in updated)
+        if full:
+            raise ValidationError(_(
+                "Not enough seats are left for the event %(event)s, only "
+                "%(seats)s can still be booked.",
+                event=full[0].display_name,
+                seats=full[0].hotel_seats_available))
+
+    @api.model
+    def _rebuild_hotel_seats(self):
+        """Recounts the hotel seats of all the events from the event lines
+        of the bookings that are not cancelled"""
+        self.env['event.booking.line'].flush_model(['event_id', 'uom_qty'])
+        self.env['room.booking'].flush_model(['state'])
+        self.env.cr.execute("""
+            UPDATE event_event event
+               SET hotel_seats_reserved = COALESCE((
+                   SELECT SUM(ROUND(line.uom_qty::numeric))
+                     FROM event_booking_line line
+                LEFT JOIN room_booking booking
+                       ON booking.id = line.booking_id
+                    WHERE line.event_id = event.id
+                      AND booking.state IS DISTINCT FROM 'cancel'), 0)
+        """)
+        self.invalidate_model(['hotel_seats_reserved',
+                               'hotel_seats_available'])
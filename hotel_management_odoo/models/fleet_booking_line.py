@@ -26,7 +26,18 @@ class FleetBookingLine(models.Model):
     """Model that handles the fleet booking"""
     _name = "fleet.booking.line"
     _description = "Hotel Fleet Line"
+    _inherit = "hotel.booking.line.mixin"
     _rec_name = 'fleet_id'
+    _sql_constraints = [
+        ('check_fleet_dates_order', 'CHECK (return_date >= pickup_date)',
+         'The vehicle must be returned after it is picked up.'),
+        ('fleet_interval_no_overlap',
+         "EXCLUDE USING gist (fleet_id WITH =, "
+         "tsrange(pickup_date, return_date, '[)') WITH &&) "
+         "WHERE (state IN ('reserved', 'check_in'))",
+         'Sorry, this vehicle is already booked for an overlapping '
+         'period.'),
+    ]
 
     @tools.ormcache()
     def _get_default_uom_id(self):
@@ -39,6 +50,20 @@ class FleetBookingLine(models.Model):
     fleet_id = fields.Many2one('fleet.vehicle.model',
                                string="Vehicle",
                                help='Indicates the Vehicle')
+    pickup_date = fields.Datetime(string="Pickup",
+                                  compute='_compute_rental_dates',
+                                  store=True, readonly=False,
+                                  help="Date the vehicle is picked up, the "
+                                       "check in of the booking by default")
+    return_date = fields.Datetime(string="Return",
+                                  compute='_compute_rental_dates',
+                                  store=True, readonly=False,
+                                  help="Date the vehicle is returned, the "
+                                       "check out of the booking by default")
+    available_fleet_ids = fields.Many2many(
+        'fleet.vehicle.model', string="Available Vehicles",
+        compute='_compute_available_fleet_ids',
+        help="Vehicles that are free for the rental period")
     description = fields.Char(string='Description',
                               related='fleet_id.display_name',
                               help="Description of Vehicle")
@@ -79,41 +104,35 @@ class FleetBookingLine(models.Model):
     state = fields.Selection(related='booking_id.state',
                              string="Order Status",
                              help=" Status of the Order",
+                             store=True, index=True,
                              copy=False)
 
-    @api.depends('uom_qty', 'price_unit', 'tax_ids')
-    def _compute_price_subtotal(self):
-        """Compute the amounts of the room booking line."""
-        for line in self:
-            base_line = line._prepare_base_line_for_taxes_computation()
-            self.env['account.tax']._add_tax_details_in_base_line(base_line, self.env.company)
-            line.price_subtotal = base_line['tax_details']['total_excluded_currency']
-            line.price_total = base_line['tax_details']['total_included_currency']
-            line.price_tax = line.price_total - line.price_subtotal
-            if self.env.context.get('import_file',
-                                    False) and not self.env.user. \
-                    user_has_groups('account.group_account_manager'):
-                line.tax_id.invalidate_recordset(
-                    ['invoice_repartition_line_ids'])
+    def _auto_init(self):
+        """The overlap exclusion constraint compares vehicle ids with a
+        GiST index, which needs the btree_gist extension."""
+        self.env.cr.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+        return super()._auto_init()
 
-    def _prepare_base_line_for_taxes_computation(self):
-        """ Convert the current record to a dictionary in order to use the generic taxes computation method
-        defined on account.tax.
+    @api.depends('booking_id.checkin_date', 'booking_id.checkout_date')
+    def _compute_rental_dates(self):
+        """The vehicle is rented for the stay unless told otherwise"""
+        for line in self:
+            line.pickup_date = line.booking_id.checkin_date
+            line.return_date = line.booking_id.checkout_date
 
-        :return: A python dictionary.
-        """
-        self.ensure_one()
-        return self.env['account.tax']._prepare_base_line_for_taxes_computation(
-            self,
-            **{
-                'tax_ids': self.tax_ids,
-                'quantity': self.uom_qty,
-                'partner_id': self.booking_id.partner_id,
-                'currency_id': self.currency_id,
-            },
-        )
+    @api.depends('pickup_date', 'return_date')
+    def _compute_available_fleet_ids(self):
+        """Vehicles that can be selected for the rental of the line"""
+        for line in self:
+            line.available_fleet_ids = self.env[
+                'fleet.vehicle.model'].search_available(
+                line.pickup_date, line.return_date,
+                exclude_line_ids=line._origin.ids)
 
-    def search_available_vehicle(self):
-        """Returns list of booked vehicles"""
-        return (self.env['fleet.vehicle.model'].search(
-            [('id', 'in', self.search([]).mapped('fleet_id').ids)]).ids)
+    @api.model
+    def search_available_vehicle(self, pickup_date=None, return_date=None):
+        """Returns the ids of the vehicles free between pickup_date and
+        return_date, by default at the present time"""
+        pickup_date = pickup_date or fields.Datetime.now()
+        return self.env['fleet.vehicle.model'].search_available(
+            pickup_date, return_date or pickup_date).ids
@@ -19,7 +19,8 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 ###############################################################################
-from odoo import fields, models, tools
+from odoo import api, fields, models, tools
+from .room_booking_line import OCCUPYING_STATES
 
 
 class FleetVehicleModel(models.Model):
@@ -37,3 +38,43 @@ class FleetVehicleModel(models.Model):
                              string='Reference Uom',
                              help="UOM of the product",
                              default=_set_default_uom_id, required=True)
+
+    @api.model
+    def search_available(self, pickup_date, return_date,
+                         exclude_line_ids=None):
+        """Returns the vehicles that are free for the whole period between
+        pickup_date and return_date, with a single anti-join served by the
+        GiST index of the fleet overlap constraint. A period without
+        duration returns the vehicles free at that time.
+        :param pickup_date: start of the rental (datetime or string)
+        :param return_date: end of the rental (datetime or string)
+        :param exclude_line_ids: fleet booking lines to ignore, e.g. the
+            lines being edited
+        :return: fleet.vehicle.model recordset"""
+        pickup_date = fields.Datetime.to_datetime(pickup_date)
+        return_date = fields.Datetime.to_datetime(return_date)
+        if not pickup_date or not return_date or return_date < pickup_date:
+            return self.browse()
+        self.env['fleet.booking.line'].flush_model(
+            ['fleet_id', 'pickup_date', 'return_date', 'state'])
+        self.env.cr.execute("""
+            SELECT vehicle.id
+              FROM fleet_vehicle_model vehicle
+             WHERE vehicle.active
+               AND NOT EXISTS (
+                   SELECT 1
+                     FROM fleet_booking_line line
+                    WHERE line.fleet_id = vehicle.id
+                      AND line.state IN %(states)s
+                      AND line.id != ALL(%(exclude_line_ids)s)
+                      AND tsrange(line.pickup_date, line.return_date, '[)')
+                          && tsrange(%(pickup)s, %(return)s, %(bounds)s))
+             ORDER BY vehicle.id
+        """, {
+            'states': OCCUPYING_STATES,
+            'exclude_line_ids': list(exclude_line_ids or []),
+            'pickup': pickup_date,
+            'return': return_date,
+            'bounds': '[]' if return_date == pickup_date else '[)',
+        })
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
@@ -21,11 +21,19 @@
 ###############################################################################
 from odoo import api, fields, models, tools
 
+# Fulfilment states of the orders still expected by the kitchen
+OPEN_FULFILMENT_STATES = ('new', 'preparing', 'ready')
+# Booking states whose food orders are not served anymore
+CLOSED_BOOKING_STATES = ('check_out', 'cancel', 'done')
+# Bus notification carrying the orders to the kitchen displays
+KITCHEN_NOTIFICATION = 'hotel_management_odoo.kitchen_orders'
+
 
 class FoodBookingLine(models.Model):
     """Model that handles the food booking"""
     _name = "food.booking.line"
     _description = "Hotel Food Line"
+    _inherit = "hotel.booking.line.mixin"
     _rec_name = 'food_id'
 
     @tools.ormcache()
@@ -77,41 +85,121 @@ class FoodBookingLine(models.Model):
     state = fields.Selection(related='booking_id.state',
                              string="Order Status",
                              help=" Status of the Order",
+                             store=True, index=True,
                              copy=False)
+    fulfilment_state = fields.Selection(
+        [('new', 'New'), ('preparing', 'Preparing'), ('ready', 'Ready'),
+         ('served', 'Served'), ('cancel', 'Cancelled')],
+        string="Kitchen Status", default='new', required=True, copy=False,
+        help="Progress of the order in the kitchen")
+
+    def init(self):
+        """The kitchen queue only reads the open orders, which stay a
+        small part of the order history"""
+        tools.create_index(
+            self.env.cr, 'food_booking_line_open_order_index', self._table,
+            ['create_date', 'id'],
+            where="fulfilment_state IN ('new', 'preparing', 'ready')")
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Sends the new orders to the kitchen displays"""
+        lines = super().create(vals_list)
+        lines._notify_kitchen()
+        return lines
+
+    def write(self, vals):
+        """Sends the changed orders to the kitchen displays"""
+        res = super().write(vals)
+        if {'fulfilment_state', 'food_id', 'uom_qty', 'booking_id'} & set(
+                vals):
+            self._notify_kitchen()
+        return res
 
-    @api.depends('uom_qty', 'price_unit', 'tax_ids')
-    def _compute_price_subtotal(self):
-        """Compute the amounts of the room booking line."""
-        for line in self:
-            base_line = line._prepare_base_line_for_taxes_computation()
-            self.env['account.tax']._add_tax_details_in_base_line(base_line, self.env.company)
-            line.price_subtotal = base_line['tax_details']['total_excluded_currency']
-            line.price_total = base_line['tax_details']['total_included_currency']
-            line.price_tax = line.price_total - line.price_subtotal
-            if self.env.context.get('import_file',
-                                    False) and not self.env.user. \
-                    user_has_groups('account.group_account_manager'):
-                line.tax_id.invalidate_recordset(
-                    ['invoice_repartition_line_ids'])
-
-    def _prepare_base_line_for_taxes_computation(self):
-        """ Convert the current record to a dictionary in order to use the generic taxes computation method
-        defined on account.tax.
-
-        :return: A python dictionary.
-        """
-        self.ensure_one()
-        return self.env['account.tax']._prepare_base_line_for_taxes_computation(
-            self,
-            **{
-                'tax_ids': self.tax_ids,
-                'quantity': self.uom_qty,
-                'partner_id': self.booking_id.partner_id,
-                'currency_id': self.currency_id,
-            },
-        )
+    def unlink(self):
+        """Removes the deleted orders from the kitchen displays and flags
+        the KPI snapshots of their days"""
+        self._notify_kitchen_removed()
+        self._mark_snapshots_stale()
+        return super().unlink()
 
+    def _mark_snapshots_stale(self):
+        """Flags the KPI snapshots of the days the orders were taken"""
+        self.env['hotel.kpi.snapshot']._mark_stale(
+            {line.create_date.date() for line in self if line.create_date})
+
+    @api.model
+    def _get_open_order_domain(self):
+        """Orders the kitchen still has to prepare or serve"""
+        return [('fulfilment_state', 'in', OPEN_FULFILMENT_STATES),
+                ('state', 'not in', CLOSED_BOOKING_STATES)]
+
+    @api.model
     def search_food_orders(self):
-        """Returns list of food orders"""
-        return (self.search([]).filtered(lambda r: r.booking_id.state not in [
-            'check_out', 'cancel', 'done']).ids)
+        """Returns the ids of the open food orders"""
+        return self.search(self._get_open_order_domain()).ids
+
+    @api.model
+    def get_kitchen_orders(self):
+        """Open orders shown by the kitchen display, oldest first"""
+        return self.search(self._get_open_order_domain(),
+                           order='create_date, id')._get_kitchen_values()
+
+    def _get_kitchen_values(self):
+        """Values of the orders as shown by the kitchen display"""
+        return [{
+            'id': line.id,
+            'product': line.food_id.display_name or '',
+            'quantity': line.uom_qty,
+            'booking': line.booking_id.name or '',
+            'rooms': ', '.join(
+                line.booking_id.room_line_ids.room_id.mapped('name')),
+            'fulfilment_state': line.fulfilment_state,
+            'create_date': fields.Datetime.to_string(line.create_date),
+            'is_open': (line.fulfilment_state in OPEN_FULFILMENT_STATES
+                        and line.state not in CLOSED_BOOKING_STATES),
+        } for line in self]
+
+    def _notify_kitchen(self):
+        """Pushes the orders to the kitchen displays, the displays drop
+        the orders that are not open anymore"""
+        if not self:
+            return
+        self.env['bus.bus']._sendone(
+            (self.env.ref('hotel_management_odoo.hotel_group_kitchen'),
+             'hotel_kitchen'),
+            KITCHEN_NOTIFICATION,
+            {'orders': self.sudo()._get_kitchen_values()})
+
+    def _notify_kitchen_removed(self):
+        """Tells the kitchen displays to drop the orders, before they are
+        deleted"""
+        if not self:
+            return
+        self.env['bus.bus']._sendone(
+            (self.env.ref('hotel_management_odoo.hotel_group_kitchen'),
+             'hotel_kitchen'),
+            KITCHEN_NOTIFICATION,
+            {'orders': [{'id': line_id, 'is_open': False}
+                        for line_id in self.ids]})
+
+    def _set_fulfilment_state(self, state):
+        """Moves the orders to the given kitchen status"""
+        self.filtered(lambda line: line.fulfilment_state != state).write(
+            {'fulfilment_state': state})
+
+    def action_prepare(self):
+        """The kitchen starts preparing the orders"""
+        self._set_fulfilment_state('preparing')
+
+    def action_ready(self):
+        """The orders are ready to be served"""
+        self._set_fulfilment_state('ready')
+
+    def action_serve(self):
+        """The orders are served to the guests"""
+        self._set_fulfilment_state('served')
+
+    def action_cancel_order(self):
+        """The orders are not prepared"""
+        self._set_fulfilment_state('cancel')
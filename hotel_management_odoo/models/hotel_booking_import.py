@@ -0,0 +1,414 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: ADARSH K (odoo@cybrosys.com)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import csv
+import io
+import json
+import logging
+import time
+from datetime import timedelta
+from itertools import groupby, islice
+from psycopg2 import IntegrityError
+from psycopg2.errors import LockNotAvailable, SerializationFailure
+from odoo import api, fields, models, Command, _
+from odoo.exceptions import UserError, ValidationError
+
+_logger = logging.getLogger(__name__)
+
+# Seconds one run of the scheduled action spends importing before it
+# hands over to the next run
+IMPORT_TIME_BUDGET = 240
+# Running imports not checkpointed since are considered lost by a killed
+# worker and resume from their checkpoint
+IMPORT_TIMEOUT = timedelta(minutes=30)
+# Errors rejecting the folio that raised them, any other error interrupts
+# the import
+FOLIO_ERRORS = (UserError, IntegrityError)
+# Errors of a chunk competing with other transactions, the chunk is rolled
+# back and imported again from the checkpoint by the next run
+CONCURRENCY_ERRORS = (LockNotAvailable, SerializationFailure)
+# Columns of the import files, one row per room line
+IMPORT_COLUMNS = ('reference', 'customer', 'checkin', 'checkout', 'room',
+                  'room_type', 'guests')
+
+
+class HotelBookingImport(models.Model):
+    """Reservations imported from the file of another property management
+    system. The file is streamed from the filestore by a scheduled action
+    in chunks, every chunk being committed with the checkpoint of the
+    import, so that an interrupted import resumes where it stopped."""
+    _name = 'hotel.booking.import'
+    _description = 'Hotel Booking Import'
+    _order = 'id desc'
+
+    name = fields.Char(string="Name", required=True,
+                       help="Name of the import")
+    file = fields.Binary(string="File", required=True, attachment=True,
+                         help="CSV file with a header line or JSON Lines "
+                              "file, with one room line per row")
+    file_name = fields.Char(string="File Name", help="Name of the file")
+    file_type = fields.Selection([('csv', 'CSV'), ('jsonl', 'JSON Lines')],
+                                 string="File Type", required=True,
+                                 default='csv',
+                                 help="Format of the file")
+    chunk_size = fields.Integer(string="Chunk Size", default=500,
+                                required=True,
+                                help="Number of rows created and committed "
+                                     "at once")
+    rate_plan_id = fields.Many2one('hotel.rate.plan', string="Rate Plan",
+                                   help="Rate plan the imported room lines "
+                                        "are priced with")
+    reserve = fields.Boolean(string="Reserve Rooms", default=True,
+                             help="Reserve the imported bookings, else they "
+                                  "are kept as drafts")
+    state = fields.Selection(
+        [('draft', 'Draft'), ('queued', 'Queued'), ('running', 'Running'),
+         ('done', 'Done'), ('failed', 'Failed')], string="Status",
+        default='draft', required=True, readonly=True, index=True,
+        copy=False, help="Queued imports are picked up by the import "
+                         "scheduled action")
+    offset = fields.Integer(string="Checkpoint", readonly=True, copy=False,
+                            help="Number of rows of the file already "
+                                 "processed, the import resumes after them")
+    total_rows = fields.Integer(string="Rows", readonly=True, copy=False,
+                                help="Number of rows of the file")
+    rows_imported = fields.Integer(string="Imported Rows", readonly=True,
+                                   copy=False,
+                                   help="Number of rows imported")
+    rows_failed = fields.Integer(string="Failed Rows", readonly=True,
+                                 copy=False,
+                                 help="Number of rows rejected")
+    progress = fields.Integer(string="Progress (%)",
+                              compute='_compute_progress',
+                              help="Share of the rows processed")
+    booking_ids = fields.One2many('room.booking', 'import_id',
+                                  string="Bookings", readonly=True,
+                                  help="Bookings created by the import")
+    booking_count = fields.Integer(string="Booking Count", readonly=True,
+                                   copy=False,
+                                   help="Number of bookings created")
+    log = fields.Text(string="Log", readonly=True, copy=False,
+                      help="Rows rejected by the import")
+    user_id = fields.Many2one('res.users', string="Requested By",
+                              required=True, readonly=True,
+                              default=lambda self: self.env.user,
+                              help="User the bookings are imported as")
+    company_id = fields.Many2one('res.company', string="Company",
+                                 required=True, readonly=True,
+                                 default=lambda self: self.env.company,
+                                 help="Company the bookings are imported "
+                                      "in")
+
+    _sql_constraints = [
+        ('chunk_size_positive', 'CHECK(chunk_size > 0)',
+         'The chunk size must be positive.'),
+    ]
+
+    @api.depends('offset', 'total_rows', 'state')
+    def _compute_progress(self):
+        """Share of the rows processed"""
+        for record in self:
+            if record.state == 'done':
+                record.progress = 100
+            elif record.total_rows:
+                record.progress = 100 * record.offset // record.total_rows
+            else:
+                record.progress = 0
+
+    def action_queue(self):
+        """Queues the imports, failed imports resume from their
+        checkpoint"""
+        self.filtered(lambda record: record.state in ('draft', 'failed')
+                      ).write({'state': 'queued'})
+        self.env.ref('hotel_management_odoo.ir_cron_hotel_booking_import'
+                     ).sudo()._trigger()
+
+    def action_reset(self):
+        """Restarts failed imports from the beginning of the file"""
+        self.filtered(lambda record: record.state == 'failed').write({
+            'state': 'draft', 'offset': 0, 'total_rows': 0,
+            'rows_imported': 0, 'rows_failed': 0, 'booking_count': 0,
+            'log': False})
+
+    def action_view_bookings(self):
+        """Bookings created by the import"""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _("Imported Bookings"),
+            'res_model': 'room.booking',
+            'view_mode': 'list,form',
+            'domain': [('import_id', '=', self.id)],
+        }
+
+    @api.model
+    def _cron_process_imports(self, time_budget=IMPORT_TIME_BUDGET):
+        """Imports chunks of the queued files until the time budget is
+        spent, then triggers the next run"""
+        deadline = time.monotonic() + time_budget
+        self.search([
+            ('state', '=', 'running'),
+            ('write_date', '<', fields.Datetime.now() - IMPORT_TIMEOUT),
+        ]).write({'state': 'queued'})
+        while time.monotonic() < deadline:
+            record = self._acquire_import()
+            if not record:
+                return
+            record._run(deadline)
+        self.env.ref('hotel_management_odoo.ir_cron_hotel_booking_import'
+                     )._trigger()
+
+    @api.model
+    def _acquire_import(self):
+        """Locks the oldest queued import, skipping the ones taken by other
+        workers, and marks it as running"""
+        self.env.cr.execute("""
+            SELECT id FROM hotel_booking_import
+             WHERE state = 'queued'
+             ORDER BY id
+             LIMIT 1
+               FOR UPDATE SKIP LOCKED
+        """)
+        row = self.env.cr.fetchone()
+        if not row:
+            return self.browse()
+        record = self.browse(row[0])
+        record.write({'state': 'running'})
+        self.env.cr.commit()
+        return record
+
+    def _run(self, deadline):
+        """Imports the file chunk by chunk from the checkpoint, committing
+        after every chunk, until the end of the file or the deadline. The
+        chunks are imported with the access rights and the company of the
+        requesting user."""
+        self.ensure_one()
+        importer = self.with_user(self.user_id).with_company(
+            self.company_id)
+        try:
+            if not self.total_rows:
+                with self._open_file() as stream:
+                    total = sum(1 for _row in self._read_rows(stream))
+                self.write({'total_rows': total})
+                self.env.cr.commit()
+            with self._open_file() as stream:
+                rows = islice(self._read_rows(stream), self.offset, None)
+                for chunk in self._iter_chunks(rows):
+                    importer._import_chunk(chunk)
+                    self.env.cr.commit()
+                    if time.monotonic() >= deadline:
+                        self.write({'state': 'queued'})
+                        self.env.cr.commit()
+                        return
+            self.write({'state': 'done'})
+        except CONCURRENCY_ERRORS:
+            _logger.info("Hotel booking import %s: chunk conflicting with "
+                         "another transaction, retried from the checkpoint",
+                         self.id)
+            self.env.cr.rollback()
+            self.write({'state': 'queued'})
+        except Exception as error:
+            _logger.exception("Hotel booking import %s failed", self.id)
+            self.env.cr.rollback()
+            self.write({
+                'state': 'failed',
+                'log': self._append_log(
+                    [_("Import interrupted: %s", error)]),
+            })
+        self.env.cr.commit()
+
+    def _open_file(self):
+        """Binary stream of the file, read from the filestore so that the
+        file is never loaded in memory at once"""
+        attachment = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_field', '=', 'file'),
+            ('res_id', '=', self.id),
+        ], limit=1)
+        if attachment.store_fname:
+            return open(attachment._full_path(attachment.store_fname), 'rb')
+        return io.BytesIO(attachment.raw or b'')
+
+    def _read_rows(self, stream):
+        """Rows of the file as dictionaries keyed by column. Rows that
+        cannot be parsed are yielded with an error, so that they are
+        rejected on their own instead of stopping the import."""
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='',
+                                errors='replace')
+        if self.file_type == 'csv':
+            for row in csv.DictReader(text):
+                yield {column: (row.get(column) or '').strip()
+                       for column in IMPORT_COLUMNS}
+        else:
+            for line in text:
+                if line.strip():
+                    yield self._parse_json_row(line)
+
+    def _parse_json_row(self, line):
+        """Row of a JSON Lines file, with an error when the line is not a
+        JSON object"""
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            return {'error': _("invalid JSON: %s", error)}
+        if not isinstance(row, dict):
+            return {'error': _("the line is not a JSON object")}
+        return {column: str(row.get(column) or '').strip()
+                for column in IMPORT_COLUMNS}
+
+    def _iter_chunks(self, rows):
+        """Groups the consecutive rows of a reference into folios and the
+        folios into chunks of about chunk_size rows, a folio is never split
+        between two chunks. A row without a reference or that could not be
+        parsed makes a folio on its own."""
+        chunk, size = [], 0
+        folios = groupby(enumerate(rows, start=self.offset + 1),
+                         key=lambda item: item[1].get('reference') or item)
+        for _reference, folio in folios:
+            folio = list(folio)
+            chunk.append(folio)
+            size += len(folio)
+            if size >= self.chunk_size:
+                yield chunk
+                chunk, size = [], 0
+        if chunk:
+            yield chunk
+
+    def _import_chunk(self, chunk):
+        """Validates the folios of the chunk with one lookup per model,
+        creates the bookings at once and moves the checkpoint"""
+        rows = [row for folio in chunk for _number, row in folio]
+        valid_rows = [row for row in rows if 'error' not in row]
+        partners = self._get_partners(
+            {row['customer'] for row in valid_rows})
+        rooms = self._get_records('hotel.room',
+                                  {row['room'] for row in valid_rows})
+        room_types = self._get_records(
+            'hotel.room.type', {row['room_type'] for row in valid_rows})
+        errors, vals_list, sizes = [], [], []
+        for folio in chunk:
+            try:
+                vals_list.append(self._prepare_booking_values(
+                    folio, partners, rooms, room_types))
+                sizes.append(len(folio))
+            except (ValidationError, ValueError) as error:
+                errors.append(_("Row %s: %s", folio[0][0], error))
+        bookings, failed, failures = self._create_bookings(vals_list)
+        errors += failures
+        imported = sum(size for index, size in enumerate(sizes)
+                       if index not in failed)
+        self.write({
+            'offset': self.offset + len(rows),
+            'rows_imported': self.rows_imported + imported,
+            'rows_failed': self.rows_failed + len(rows) - imported,
+            'booking_count': self.booking_count + len(bookings),
+            'log': self._append_log(errors),
+        })
+
+    def _get_partners(self, names):
+        """Customers by name, the missing ones are created at once"""
+        names.discard('')
+        partners = self._get_records('res.partner', names)
+        missing = sorted(names - set(partners))
+        if missing:
+            partners.update(zip(missing, self.env['res.partner'].create(
+                [{'name': name} for name in missing]).ids))
+        return partners
+
+    def _get_records(self, model, names):
+        """Ids of the records of the model by name"""
+        names = [name for name in names if name]
+        if not names:
+            return {}
+        return {record.name: record.id for record in self.env[model].search(
+            [('name', 'in', names)], order='id desc')}
+
+    def _prepare_booking_values(self, folio, partners, rooms, room_types):
+        """Values of the booking of a folio, raises when a row is invalid"""
+        lines = []
+        for number, row in folio:
+            if 'error' in row:
+                raise ValidationError(row['error'])
+            checkin = fields.Datetime.to_datetime(row['checkin'] or False)
+            checkout = fields.Datetime.to_datetime(row['checkout'] or False)
+            if not checkin or not checkout or checkout <= checkin:
+                raise ValidationError(_(
+                    "row %s must check out after it checks in", number))
+            room_id = rooms.get(row['room'])
+            room_type_id = room_types.get(row['room_type'])
+            if row['room'] and not room_id:
+                raise ValidationError(_("unknown room %s", row['room']))
+            if not room_id and not room_type_id:
+                raise ValidationError(_(
+                    "row %s has no known room or room type", number))
+            lines.append(Command.create({
+                'checkin_date': checkin,
+                'checkout_date': checkout,
+                'room_id': room_id,
+                'room_type_id': room_type_id,
+                'num_person': int(row['guests'] or 1),
+            }))
+        customer = folio[0][1]['customer']
+        if not customer:
+            raise ValidationError(_("the folio has no customer"))
+        return {
+            'partner_id': partners[customer],
+            'import_id': self.id,
+            'rate_plan_id': self.rate_plan_id.id,
+            'room_line_ids': lines,
+        }
+
+    def _create_bookings(self, vals_list):
+        """Creates the bookings in one batch, falling back to one booking
+        at a time when the batch fails, so that a single invalid folio
+        only rejects its own rows. Concurrency errors are raised, so that
+        the whole chunk is retried. Returns the bookings, the indexes of
+        the rejected values and the errors."""
+        try:
+            with self.env.cr.savepoint():
+                return self._create_and_reserve(vals_list), set(), []
+        except FOLIO_ERRORS:
+            _logger.info("Hotel booking import %s: chunk rejected, "
+                         "importing its folios one by one", self.id)
+        bookings, failed, errors = self.env['room.booking'], set(), []
+        for index, vals in enumerate(vals_list):
+            try:
+                with self.env.cr.savepoint():
+                    bookings |= self._create_and_reserve([vals])
+            except FOLIO_ERRORS as error:
+                failed.add(index)
+                errors.append(_("Folio of %s: %s",
+                                self.env['res.partner'].browse(
+                                    vals['partner_id']).name, error))
+        return bookings, failed, errors
+
+    def _create_and_reserve(self, vals_list):
+        """Creates the bookings and reserves their rooms"""
+        bookings = self.env['room.booking'].create(vals_list)
+        if self.reserve:
+            bookings.action_reserve()
+        return bookings
+
+    def _append_log(self, messages):
+        """Log of the import with the messages appended"""
+        if not messages:
+            return self.log
+        return '\n'.join(filter(None, [self.log] + messages))
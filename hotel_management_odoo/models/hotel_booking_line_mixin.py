@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: ADARSH K (odoo@cybrosys.com)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from odoo import api, models
+
+
+class HotelBookingLineMixin(models.AbstractModel):
+    """Price computation shared by the room, food, service, fleet and
+    event lines of the room bookings"""
+    _name = 'hotel.booking.line.mixin'
+    _description = 'Hotel Booking Line Mixin'
+
+    @api.depends('uom_qty', 'price_unit', 'tax_ids')
+    def _compute_price_subtotal(self):
+        """Compute the amounts of the booking lines. The tax details are
+        computed once per distinct taxes, price, quantity and currency,
+        which most lines of a recordset share after a tax change."""
+        amounts = {}
+        for line in self:
+            key = (tuple(line.tax_ids.ids), line.price_unit, line.uom_qty,
+                   line.currency_id.id)
+            if key not in amounts:
+                base_line = line._prepare_base_line_for_taxes_computation()
+                self.env['account.tax']._add_tax_details_in_base_line(
+                    base_line, self.env.company)
+                tax_details = base_line['tax_details']
+                amounts[key] = (tax_details['total_excluded_currency'],
+                                tax_details['total_included_currency'])
+            line.price_subtotal, line.price_total = amounts[key]
+            line.price_tax = line.price_total - line.price_subtotal
+        if self.env.context.get('import_file') and not self.env.user.has_group(
+                'account.group_account_manager'):
+            self.tax_ids.invalidate_recordset(
+                ['invoice_repartition_line_ids'])
+
+    def _prepare_base_line_for_taxes_computation(self):
+        """ Convert the current record to a dictionary in order to use the
+        generic taxes computation method defined on account.tax.
+
+        :return: A python dictionary.
+        """
+        self.ensure_one()
+        return self.env['account.tax']._prepare_base_line_for_taxes_computation(
+            self,
+            **{
+                'tax_ids': self.tax_ids,
+                'quantity': self.uom_qty,
+                'partner_id': self.booking_id.partner_id,
+                'currency_id': self.currency_id,
+            },
+        )
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: ADARSH K (odoo@cybrosys.com)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import time
+from datetime import datetime, timedelta
+import pytz
+from odoo import api, fields, models
+
+# Dashboard tiles per (database, user, companies, timezone):
+# (expiry, values), the tiles depending on the access rights of the user.
+# Each worker keeps its own copy, the short lifetime bounds how long a
+# worker can show figures that another worker has invalidated. The
+# expired entries are pruned whenever tiles are cached.
+_DASHBOARD_CACHE = {}
+DASHBOARD_CACHE_TTL = 60
+
+
+class HotelDashboard(models.AbstractModel):
+    """Computes the tiles of the hotel dashboard with aggregate queries
+    and caches them for a short time"""
+    _name = 'hotel.dashboard'
+    _description = 'Hotel Dashboard'
+
+    @api.model
+    def get_tiles(self):
+        """Returns the dashboard tiles, from the cache when still fresh"""
+        key = (self.env.cr.dbname, self.env.uid,
+               tuple(self.env.companies.ids), self.env.user.tz or 'UTC')
+        cached = _DASHBOARD_CACHE.get(key)
+        if cached and cached[0] > time.monotonic():
+            return dict(cached[1])
+        values = self._compute_tiles()
+        now = time.monotonic()
+        for cached_key, (expiry, _values) in list(_DASHBOARD_CACHE.items()):
+            if expiry <= now:
+                _DASHBOARD_CACHE.pop(cached_key, None)
+        _DASHBOARD_CACHE[key] = (now + DASHBOARD_CACHE_TTL, values)
+        return dict(values)
+
+    @api.model
+    def _invalidate_cache(self):
+        """Drops the cached tiles of the database once the current
+        transaction is committed"""
+        postcommit = self.env.cr.postcommit
+        if postcommit.data.get('hotel.dashboard.invalidate'):
+            return
+        postcommit.data['hotel.dashboard.invalidate'] = True
+        dbname = self.env.cr.dbname
+
+        def invalidate():
+            for key in [key for key in _DASHBOARD_CACHE if key[0] == dbname]:
+                _DASHBOARD_CACHE.pop(key, None)
+
+        postcommit.add(invalidate)
+
+    @api.model
+    def _get_today_bounds(self):
+        """Returns the UTC bounds of the current day of the user, so that
+        the datetime columns can be compared with a plain range scan"""
+        tz = pytz.timezone(self.env.user.tz or 'UTC')
+        today = datetime.now(tz).date()
+        start, end = (
+            tz.localize(datetime.combine(day, datetime.min.time()))
+            .astimezone(pytz.utc).replace(tzinfo=None)
+            for day in (today, today + timedelta(days=1)))
+        return today, start, end
+
+    @api.model
+    def _compute_tiles(self):
+        """Computes every tile with one count or aggregate query"""
+        today, today_start, today_end = self._get_today_bounds()
+        booking_states = dict(self.env['room.booking']._read_group(
+            [('state', 'in', ['reserved', 'check_in'])], ['state'],
+            ['__count']))
+        check_out = self.env['room.booking.line'].search_count(
+            [('checkout_date', '>=', today_start),
+             ('checkout_date', '<', today_end)])
+        staff = self.env['res.users'].search_count(
+            [('groups_id', 'in',
+              [self.env.ref('hotel_management_odoo.hotel_group_admin').id,
+               self.env.ref(
+                   'hotel_management_odoo.cleaning_team_group_head').id,
+               self.env.ref(
+                   'hotel_management_odoo.cleaning_team_group_user').id,
+               self.env.ref(
+                   'hotel_management_odoo.hotel_group_reception').id,
+               self.env.ref(
+                   'hotel_management_odoo.maintenance_team_group_leader').id,
+               self.env.ref(
+                   'hotel_management_odoo.maintenance_team_group_user').id
+               ])])
+        total_vehicle = self.env['fleet.vehicle.model'].search_count([])
+        available_vehicle = len(self.env[
+            'fleet.booking.line'].search_available_vehicle())
+        event = self.env['event.event']
+        food_order = self.env['food.booking.line'].search_count(
+            self.env['food.booking.line']._get_open_order_domain())
+        [[total_revenue, pending_payment]] = self.env[
+            'room.booking']._read_group(
+            [('payment_state', '!=', 'no_invoice')], [],
+            ['amount_paid:sum', 'amount_residual:sum'])
+        [[today_revenue]] = self.env['account.move']._read_group(
+            [('hotel_booking_id', '!=', False), ('payment_state', '=', 'paid'),
+             ('date', '=', today)],
+            [], ['amount_total:sum'])
+        company_currency = self.env.user.company_id.currency_id
+        return {
+            'total_room': self.env['hotel.room'].search_count([]),
+            'available_room': self.env['hotel.room'].search_count(
+                [('status', '=', 'available')]),
+            'staff': staff,
+            'check_in': booking_states.get('check_in', 0),
+            'reservation': booking_states.get('reserved', 0),
+            'check_out': check_out,
+            'total_vehicle': total_vehicle,
+            'available_vehicle': available_vehicle,
+            'total_event': event.search_count([]),
+            'today_events': event.search_count(
+                [('date_end', '>=', today_start),
+                 ('date_end', '<', today_end)]),
+            'pending_events': event.search_count(
+                [('date_end', '>=', fields.Datetime.now())]),
+            'food_items': self.env['lunch.product'].search_count([]),
+            'food_order': food_order,
+            'total_revenue': round(total_revenue or 0.0, 2),
+            'today_revenue': round(today_revenue or 0.0, 2),
+            'pending_payment': round(pending_payment or 0.0, 2),
+            'currency_symbol': company_currency.symbol,
+            'currency_position': company_currency.position,
+        }
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: ADARSH K (odoo@cybrosys.com)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from datetime import timedelta
+from odoo import api, fields, models
+
+# Number of days the first run of the snapshot job goes back in time
+SNAPSHOT_BACKFILL_DAYS = 365
+
+
+class HotelKpiSnapshot(models.Model):
+    """Daily snapshot of the hotel KPIs, filled by a scheduled action so
+    that trends are read without scanning the transactional tables"""
+    _name = 'hotel.kpi.snapshot'
+    _description = 'Hotel KPI Snapshot'
+    _order = 'date desc'
+    _rec_name = 'date'
+    _log_access = False
+    _sql_constraints = [
+        ('date_uniq', 'unique(date)', 'Only one snapshot is kept per day.'),
+    ]
+
+    date = fields.Date(string="Date", required=True, readonly=True,
+                       help="Day of the snapshot")
+    rooms_total = fields.Integer(string="Rooms", readonly=True,
+                                 help="Number of rooms of the hotel")
+    rooms_sold = fields.Integer(string="Rooms Sold", readonly=True,
+                                help="Number of rooms occupied that night")
+    occupancy = fields.Float(string="Occupancy (%)", readonly=True,
+                             aggregator='avg',
+                             help="Rooms sold over the number of rooms")
+    room_revenue = fields.Float(string="Room Revenue", readonly=True,
+                                digits='Product Price',
+                                help="Untaxed room revenue of the night")
+    adr = fields.Float(string="ADR", readonly=True, aggregator='avg',
+                       digits='Product Price',
+                       help="Average Daily Rate: room revenue per room sold")
+    revpar = fields.Float(string="RevPAR", readonly=True, aggregator='avg',
+                          digits='Product Price',
+                          help="Revenue Per Available Room")
+    food_orders = fields.Integer(string="Food Orders", readonly=True,
+                                 help="Number of food lines ordered that day")
+    pending_payment = fields.Float(string="Pending Payment", readonly=True,
+                                   digits='Product Price',
+                                   help="Amount still due on the booking "
+                                        "invoices dated that day")
+    stale = fields.Boolean(string="Stale", readonly=True, index=True,
+                           help="Set when the bookings of that day changed "
+                                "since the snapshot was computed")
+
+    @api.model
+    def _mark_stale(self, dates):
+        """Flags the snapshots of the given days for recomputation"""
+        if dates:
+            self.env.cr.execute("""
+                UPDATE hotel_kpi_snapshot
+                   SET stale = TRUE
+                 WHERE date = ANY(%s) AND stale IS NOT TRUE
+            """, [list(dates)])
+
+    @api.model
+    def _cron_update_snapshots(self):
+        """Recomputes the snapshots of the days changed since the last run
+        and adds the days that have no snapshot yet, up to today"""
+        params = self.env['ir.config_parameter'].sudo()
+        last_run = params.get_param(
+            'hotel_management_odoo.kpi_snapshot_last_run')
+        now = fields.Datetime.now()
+        today = fields.Date.context_today(self)
+        self.env.flush_all()
+        self.env.cr.execute("SELECT max(date) FROM hotel_kpi_snapshot")
+        last_date = self.env.cr.fetchone()[0]
+        start = (last_date + timedelta(days=1) if last_date
+                 else today - timedelta(days=SNAPSHOT_BACKFILL_DAYS))
+        dates = {start + timedelta(days=day)
+                 for day in range((today - start).days + 1)}
+        dates.add(today)
+        self.env.cr.execute(
+            "SELECT date FROM hotel_kpi_snapshot WHERE stale")
+        dates.update(row[0] for row in self.env.cr.fetchall())
+        if last_run:
+            dates.update(self._get_changed_dates(last_run, today))
+        self._compute_snapshots(sorted(dates))
+        params.set_param('hotel_management_odoo.kpi_snapshot_last_run',
+                         fields.Datetime.to_string(now))
+
+    @api.model
+    def _get_changed_dates(self, since, until):
+        """Days of the food orders and booking invoices changed since the
+        last run. Room nights flag their snapshots themselves when the
+        occupancy grid is rebuilt, deleted food orders when they are
+        deleted."""
+        self.env.cr.execute("""
+            SELECT DISTINCT create_date::date
+              FROM food_booking_line
+             WHERE write_date > %(since)s
+            UNION
+            SELECT DISTINCT invoice_date
+              FROM account_move
+             WHERE write_date > %(since)s
+               AND invoice_date <= %(until)s
+               AND hotel_booking_id IS NOT NULL
+        """, {'since': since, 'until': until})
+        return {row[0] for row in self.env.cr.fetchall() if row[0]}
+
+    @api.model
+    def _compute_snapshots(self, dates):
+        """Computes the KPIs of the given days with set based queries on
+        the occupancy grid and upserts the snapshots"""
+        if not dates:
+            return
+        self.env.cr.execute("""
+            WITH days AS (
+                SELECT unnest(%(dates)s::date[]) AS date
+            ), rooms AS (
+                SELECT count(*) AS total FROM hotel_room
+            ), nights AS (
+                SELECT booking_line_id, count(*) AS nights
+                  FROM hotel_room_occupancy
+                 WHERE booking_line_id IN (
+                       SELECT booking_line_id FROM hotel_room_occupancy
+                        WHERE date = ANY(%(dates)s::date[]))
+                 GROUP BY booking_line_id
+            ), sold AS (
+                SELECT occupancy.date,
+                       count(DISTINCT occupancy.room_id) AS rooms_sold,
+                       sum(line.price_subtotal / nights.nights) AS revenue
+                  FROM hotel_room_occupancy occupancy
+                  JOIN room_booking_line line
+                    ON line.id = occupancy.booking_line_id
+                  JOIN nights
+                    ON nights.booking_line_id = occupancy.booking_line_id
+                 WHERE occupancy.date = ANY(%(dates)s::date[])
+                 GROUP BY occupancy.date
+            ), food AS (
+                SELECT create_date::date AS date, count(*) AS orders
+                  FROM food_booking_line
+                 WHERE create_date >= %(date_from)s
+                   AND create_date < %(date_to)s
+                   AND create_date::date = ANY(%(dates)s::date[])
+                 GROUP BY create_date::date
+            ), pending AS (
+                SELECT invoice_date AS date,
+                       sum(amount_residual) AS amount
+                  FROM account_move
+                 WHERE invoice_date = ANY(%(dates)s::date[])
+                   AND hotel_booking_id IS NOT NULL
+                   AND state = 'posted'
+                   AND payment_state IN ('not_paid', 'partial')
+                 GROUP BY invoice_date
+            )
+            INSERT INTO hotel_kpi_snapshot
+                   (date, rooms_total, rooms_sold, occupancy, room_revenue,
+                    adr, revpar, food_orders, pending_payment, stale)
+            SELECT days.date, rooms.total,
+                   COALESCE(sold.rooms_sold, 0),
+                   COALESCE(sold.rooms_sold, 0) * 100.0
+                       / NULLIF(rooms.total, 0),
+                   COALESCE(sold.revenue, 0),
+                   COALESCE(sold.revenue / NULLIF(sold.rooms_sold, 0), 0),
+                   COALESCE(sold.revenue / NULLIF(rooms.total, 0), 0),
+                   COALESCE(food.orders, 0),
+                   COALESCE(pending.amount, 0),
+                   FALSE
+              FROM days
+             CROSS JOIN rooms
+              LEFT JOIN sold ON sold.date = days.date
+              LEFT JOIN food ON food.date = days.date
+              LEFT JOIN pending ON pending.date = days.date
+                ON CONFLICT (date) DO UPDATE
+               SET rooms_total = EXCLUDED.rooms_total,
+                   rooms_sold = EXCLUDED.rooms_sold,
+                   occupancy = EXCLUDED.occupancy,
+                   room_revenue = EXCLUDED.room_revenue,
+                   adr = EXCLUDED.adr,
+                   revpar = EXCLUDED.revpar,
+                   food_orders = EXCLUDED.food_orders,
+                   pending_payment = EXCLUDED.pending_payment,
+                   stale = FALSE
+        """, {
+            'dates': list(dates),
+            'date_from': min(dates),
+            'date_to': max(dates) + timedelta(days=1),
+        })
+        self.invalidate_model()
+
+    @api.model
+    def get_trend(self, days=30):
+        """Returns the KPIs of the last days for the dashboard charts"""
+        since = fields.Date.context_today(self) - timedelta(days=days - 1)
+        snapshots = self.search_read(
+            [('date', '>=', since)],
+            ['date', 'occupancy', 'adr', 'revpar', 'food_orders',
+             'pending_payment'], order='date')
+        return {
+            'labels': [fields.Date.to_string(rec['date'])
+                       for rec in snapshots],
+            'occupancy': [round(rec['occupancy'], 2) for rec in snapshots],
+            'adr': [round(rec['adr'], 2) for rec in snapshots],
+            'revpar': [round(rec['revpar'], 2) for rec in snapshots],
+            'food_orders': [rec['food_orders'] for rec in snapshots],
+            'pending_payment': [round(rec['pending_payment'], 2)
+                                for rec in snapshots],
+        }
@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: ADARSH K (odoo@cybrosys.com)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import math
+from datetime import timedelta
+from odoo import api, fields, models, _
+from odoo.exceptions import ValidationError
+
+# Number of days ahead the nightly prices are generated for
+RATE_HORIZON_DAYS = 730
+WEEKDAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+
+
+def stay_nights(checkin, checkout):
+    """Number of nights of a stay, counted as in the occupancy grid"""
+    return max(math.ceil(
+        (checkout - checkin).total_seconds() / 86400.0), 1)
+
+
+class HotelRatePlan(models.Model):
+    """Rate plan pricing the nights of each room type. The rules of the
+    plan are evaluated once into the hotel.rate.night table, stays are
+    priced by summing their precomputed nights."""
+    _name = 'hotel.rate.plan'
+    _description = 'Hotel Rate Plan'
+    _order = 'sequence, id'
+
+    name = fields.Char(string="Name", required=True, translate=True,
+                       help="Name of the rate plan")
+    sequence = fields.Integer(string="Sequence", default=10,
+                              help="Order of the rate plans")
+    active = fields.Boolean(string="Active", default=True,
+                            help="Archived plans do not price any night")
+    rule_ids = fields.One2many('hotel.rate.rule', 'plan_id',
+                               string="Nightly Rates",
+                               help="Nightly price of the room types per "
+                                    "season and day of the week, the first "
+                                    "matching rule gives the price")
+    los_rule_ids = fields.One2many('hotel.rate.los.rule', 'plan_id',
+                                   string="Length of Stay Discounts",
+                                   help="Discounts on the stays of at least "
+                                        "a number of nights")
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Generates the nightly prices of the new plans"""
+        plans = super().create(vals_list)
+        plans._regenerate_nights()
+        return plans
+
+    def write(self, vals):
+        """Archiving or restoring a plan adds or removes its nights"""
+        res = super().write(vals)
+        if 'active' in vals:
+            self._regenerate_nights()
+        return res
+
+    @api.model
+    def _get_horizon(self):
+        """First and last day of the nightly price table"""
+        today = fields.Date.today()
+        return today, today + timedelta(days=RATE_HORIZON_DAYS)
+
+    def _regenerate_nights(self, room_type_ids=None, date_from=None,
+                           date_to=None):
+        """Regenerates the nightly prices of the plans, for the given room
+        types and days only. The first matching rule of each room type
+        and night is picked in a single insert query."""
+        if not self:
+            return
+        horizon_start, horizon_end = self._get_horizon()
+        date_from = max(date_from or horizon_start, horizon_start)
+        date_to = min(date_to or horizon_end, horizon_end)
+        if date_from > date_to:
+            return
+        self.flush_model(['active'])
+        self.env['hotel.rate.rule'].flush_model()
+        params = {
+            'plan_ids': self.ids,
+            'room_type_ids': room_type_ids,
+            'date_from': date_from,
+            'date_to': date_to,
+        }
+        self.env.cr.execute("""
+            DELETE FROM hotel_rate_night
+             WHERE plan_id = ANY(%(plan_ids)s::int[])
+               AND (%(room_type_ids)s::int[] IS NULL
+                    OR room_type_id = ANY(%(room_type_ids)s::int[]))
+               AND date BETWEEN %(date_from)s AND %(date_to)s
+        """, params)
+        self.env.cr.execute("""
+            INSERT INTO hotel_rate_night (plan_id, room_type_id, date, price)
+            SELECT DISTINCT ON (rule.plan_id, rule.room_type_id, series.night)
+                   rule.plan_id, rule.room_type_id, series.night, rule.price
+              FROM generate_series(%(date_from)s::date, %(date_to)s::date,
+                                   interval '1 day') AS series(night)
+              JOIN hotel_rate_rule rule
+                ON (rule.date_from IS NULL OR rule.date_from <= series.night)
+               AND (rule.date_to IS NULL OR rule.date_to >= series.night)
+              JOIN hotel_rate_plan plan
+                ON plan.id = rule.plan_id
+             WHERE plan.active
+               AND rule.plan_id = ANY(%(plan_ids)s::int[])
+               AND (%(room_type_ids)s::int[] IS NULL
+                    OR rule.room_type_id = ANY(%(room_type_ids)s::int[]))
+               AND (ARRAY[rule.mon, rule.tue, rule.wed, rule.thu, rule.fri,
+                          rule.sat, rule.sun]
+                   )[EXTRACT(ISODOW FROM series.night)::int]
+             ORDER BY rule.plan_id, rule.room_type_id, series.night,
+                      rule.sequence, rule.id
+        """, params)
+        self.env['hotel.rate.night'].invalidate_model()
+
+    @api.model
+    def _cron_extend_horizon(self):
+        """Generates the nights entering the horizon since the last run"""
+        param = self.env['ir.config_parameter'].sudo()
+        horizon_start, horizon_end = self._get_horizon()
+        last_end = fields.Date.to_date(param.get_param(
+            'hotel_management_odoo.rate_horizon_end'))
+        date_from = last_end + timedelta(days=1) if last_end \
+            else horizon_start
+        self.search([])._regenerate_nights(date_from=date_from,
+                                           date_to=horizon_end)
+        param.set_param('hotel_management_odoo.rate_horizon_end',
+                        fields.Date.to_string(horizon_end))
+
+    def _get_stay_prices(self, stays):
+        """Prices stays by summing their precomputed nights, all the stays
+        being priced by one query. Stays with a night the plan does not
+        price are left out.
+        :param stays: list of (key, room type id, first night, nights)
+        :return: dictionary {key: price of the stay}"""
+        self.ensure_one()
+        stays = [stay for stay in stays if stay[1]]
+        if not stays:
+            return {}
+        self.env.cr.execute("""
+            SELECT stay.key, count(night.id), sum(night.price)
+              FROM (VALUES %s) AS stay(key, room_type_id, date_from, nights)
+              JOIN hotel_rate_night night
+                ON night.plan_id = %%s
+               AND night.room_type_id = stay.room_type_id
+               AND night.date >= stay.date_from
+               AND night.date < stay.date_from + stay.nights
+             GROUP BY stay.key, stay.nights
+            HAVING count(night.id) = stay.nights
+        """ % ", ".join(["(%s, %s, %s::date, %s)"] * len(stays)),
+            [param for stay in stays for param in stay] + [self.id])
+        prices = dict(
+            (key, total) for key, _count, total in self.env.cr.fetchall())
+        nights = {stay[0]: (stay[1], stay[3]) for stay in stays}
+        for key in prices:
+            room_type_id, stay_length = nights[key]
+            prices[key] *= 1 - self._get_los_discount(
+                room_type_id, stay_length) / 100.0
+        return prices
+
+    def _get_los_discount(self, room_type_id, nights):
+        """Best length of stay discount of the plan for the stay"""
+        return max(self.los_rule_ids.filtered(
+            lambda rule: rule.min_nights <= nights and (
+                not rule.room_type_id or rule.room_type_id.id == room_type_id)
+        ).mapped('discount'), default=0.0)
+
+    def get_quotes(self, checkin, checkout):
+        """Returns the price of the stay for every room type the plan
+        prices for the whole stay
+        :param checkin: check in date or datetime
+        :param checkout: check out date or datetime
+        :return: dictionary {room type id: price of the stay}"""
+        self.ensure_one()
+        checkin = fields.Datetime.to_datetime(checkin)
+        checkout = fields.Datetime.to_datetime(checkout)
+        if not checkin or not checkout or checkout < checkin:
+            return {}
+        nights = stay_nights(checkin, checkout)
+        room_types = self.env['hotel.room.type'].search([])
+        return self._get_stay_prices([
+            (room_type.id, room_type.id, checkin.date(), nights)
+            for room_type in room_types])
+
+
+class HotelRateRule(models.Model):
+    """Nightly price of a room type for a season and days of the week"""
+    _name = 'hotel.rate.rule'
+    _description = 'Hotel Rate Rule'
+    _order = 'plan_id, sequence, id'
+
+    plan_id = fields.Many2one('hotel.rate.plan', string="Rate Plan",
+                              required=True, ondelete='cascade', index=True,
+                              help="Rate plan of the rule")
+    sequence = fields.Integer(string="Sequence", default=10,
+                              help="The first matching rule prices a night")
+    room_type_id = fields.Many2one('hotel.room.type', string="Room Type",
+                                   required=True, ondelete='cascade',
+                                   help="Room type priced by the rule")
+    date_from = fields.Date(string="From",
+                            help="First night of the season, leave empty "
+                                 "for no start")
+    date_to = fields.Date(string="To",
+                          help="Last night of the season, leave empty for "
+                               "no end")
+    mon = fields.Boolean(string="Mon", default=True)
+    tue = fields.Boolean(string="Tue", default=True)
+    wed = fields.Boolean(string="Wed", default=True)
+    thu = fields.Boolean(string="Thu", default=True)
+    fri = fields.Boolean(string="Fri", default=True)
+    sat = fields.Boolean(string="Sat", default=True)
+    sun = fields.Boolean(string="Sun", default=True)
+    price = fields.Float(string="Nightly Price", digits='Product Price',
+                         required=True, help="Price of one night")
+
+    @api.constrains('date_from', 'date_to')
+    def _check_dates(self):
+        """The season must end after it starts"""
+        for rule in self:
+            if rule.date_from and rule.date_to \
+                    and rule.date_from > rule.date_to:
+                raise ValidationError(
+                    _("The season of a rate must end after it starts."))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Prices the nights of the new rules"""
+        rules = super().create(vals_list)
+        rules._regenerate_nights()
+        return rules
+
+    def write(self, vals):
+        """Reprices the nights covered by the rules before and after the
+        change"""
+        previous = self._get_nights_scope()
+        res = super().write(vals)
+        self._regenerate_nights(previous)
+        return res
+
+    def unlink(self):
+        """Reprices the nights the rules were pricing"""
+        plans, room_types, date_from, date_to = self._get_nights_scope()
+        res = super().unlink()
+        plans.exists()._regenerate_nights(room_types.ids, date_from, date_to)
+        return res
+
+    def _get_nights_scope(self):
+        """Plans, room types and days priced by the rules, None standing
+        for a season without start or end"""
+        dates_from = self.mapped('date_from')
+        dates_to = self.mapped('date_to')
+        return (
+            self.plan_id,
+            self.room_type_id,
+            min(dates_from) if self and all(dates_from) else None,
+            max(dates_to) if self and all(dates_to) else None,
+        )
+
+    def _regenerate_nights(self, previous=None):
+        """Regenerates the nights covered by the rules, and by their
+        previous scope when they are modified"""
+        plans, room_types, date_from, date_to = self._get_nights_scope()
+        if previous:
+            plans |= previous[0]
+            room_types |= previous[1]
+            date_from = previous[2] and date_from and min(previous[2],
+                                                          date_from)
+            date_to = previous[3] and date_to and max(previous[3], date_to)
+        plans.exists()._regenerate_nights(room_types.ids, date_from,
+                                          date_to)
+
+
+class HotelRateLosRule(models.Model):
+    """Discount of a rate plan on the stays of at least a number of
+    nights"""
+    _name = 'hotel.rate.los.rule'
+    _description = 'Hotel Length of Stay Discount'
+    _order = 'plan_id, min_nights'
+
+    plan_id = fields.Many2one('hotel.rate.plan', string="Rate Plan",
+                              required=True, ondelete='cascade', index=True,
+                              help="Rate plan of the discount")
+    room_type_id = fields.Many2one('hotel.room.type', string="Room Type",
+                                   ondelete='cascade',
+                                   help="Leave empty for all the room types")
+    min_nights = fields.Integer(string="Minimum Nights", required=True,
+                                default=7,
+                                help="Minimum length of the stay")
+    discount = fields.Float(string="Discount (%)", digits='Discount',
+                            help="Discount on the price of the stay")
+
+
+class HotelRateNight(models.Model):
+    """Price of a room type for one night of a rate plan, generated from
+    the rules of the plan"""
+    _name = 'hotel.rate.night'
+    _description = 'Hotel Nightly Rate'
+    _order = 'date, room_type_id'
+    _log_access = False
+    _sql_constraints = [
+        ('night_uniq', 'unique(plan_id, room_type_id, date)',
+         'A rate plan prices a room type once per night.'),
+    ]
+
+    plan_id = fields.Many2one('hotel.rate.plan', string="Rate Plan",
+                              required=True, readonly=True,
+                              ondelete='cascade')
+    room_type_id = fields.Many2one('hotel.room.type', string="Room Type",
+                                   required=True, readonly=True,
+                                   ondelete='cascade')
+    date = fields.Date(string="Night", required=True, readonly=True)
+    price = fields.Float(string="Price", digits='Product Price',
+                         readonly=True, aggregator='avg',
+                         help="Price of the night")
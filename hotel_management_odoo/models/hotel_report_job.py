@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: ADARSH K (odoo@cybrosys.com)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import logging
+import tempfile
+from datetime import timedelta
+from odoo import api, fields, models, _
+
+_logger = logging.getLogger(__name__)
+
+# Report actions rendered by the jobs, per report wizard
+JOB_REPORTS = {
+    'room.booking.detail': 'hotel_management_odoo.action_report_room_booking',
+    'sale.order.detail': 'hotel_management_odoo.action_report_sale_order',
+}
+# Number of jobs processed by one run of the scheduled action
+JOB_BATCH_SIZE = 5
+# Running jobs older than this are considered lost by a killed worker
+JOB_TIMEOUT = timedelta(hours=2)
+XLSX_MIMETYPE = ('application/vnd.openxmlformats-officedocument.'
+                 'spreadsheetml.sheet')
+
+
+class HotelReportJob(models.Model):
+    """Report rendered in the background by a scheduled action, so that
+    large exports do not block the HTTP workers"""
+    _name = 'hotel.report.job'
+    _description = 'Hotel Report Job'
+    _order = 'id desc'
+
+    name = fields.Char(string="Name", required=True, readonly=True,
+                       help="Name of the report")
+    report_model = fields.Selection(
+        [('room.booking.detail', 'Room Booking'),
+         ('sale.order.detail', 'Sale Order')],
+        string="Report", required=True, readonly=True,
+        help="Report wizard the job was queued from")
+    output_format = fields.Selection([('pdf', 'PDF'), ('xlsx', 'Excel')],
+                                     string="Format", required=True,
+                                     readonly=True,
+                                     help="Format of the generated file")
+    state = fields.Selection(
+        [('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'),
+         ('failed', 'Failed')], string="Status", default='queued',
+        required=True, readonly=True, index=True, copy=False,
+        help="Queued jobs are picked up by the report scheduled action")
+    checkin = fields.Date(string="Check In", readonly=True,
+                          help="Check in date of the report")
+    checkout = fields.Date(string="Check Out", readonly=True,
+                           help="Check out date of the report")
+    room_id = fields.Many2one('hotel.room', string="Room", readonly=True,
+                              help="Room of the report")
+    user_id = fields.Many2one('res.users', string="Requested By",
+                              required=True, readonly=True,
+                              default=lambda self: self.env.user,
+                              help="User the report is rendered for")
+    attachment_id = fields.Many2one('ir.attachment', string="File",
+                                    readonly=True, copy=False,
+                                    ondelete='set null',
+                                    help="Generated report file")
+    date_done = fields.Datetime(string="Done On", readonly=True, copy=False,
+                                help="Date the job finished")
+    error = fields.Text(string="Error", readonly=True, copy=False,
+                        help="Error raised while rendering the report")
+
+    @api.model
+    def _enqueue(self, wizard, output_format):
+        """Queues a report job with the values of the wizard and wakes
+        up the worker, returning a notification for the client"""
+        job = self.create({
+            'name': '%s (%s)' % (
+                dict(self._fields['report_model'].selection)[wizard._name],
+                output_format.upper()),
+            'report_model': wizard._name,
+            'output_format': output_format,
+            **wizard._get_report_job_values(),
+        })
+        cron = self.env.ref('hotel_management_odoo.ir_cron_hotel_report_job',
+                            raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'type': 'info',
+                'message': _("%s is generated in the background, you will "
+                             "be notified when it is ready.", job.name),
+                'next': {'type': 'ir.actions.act_window_close'},
+            },
+        }
+
+    def action_download(self):
+        """Downloads the generated file"""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_url',
+            'url': '/web/content/%s?download=true' % self.attachment_id.id,
+            'target': 'self',
+        }
+
+    def action_retry(self):
+        """Queues failed jobs again"""
+        self.filtered(lambda job: job.state == 'failed').write({
+            'state': 'queued', 'error': False})
+        self.env.ref('hotel_management_odoo.ir_cron_hotel_report_job'
+                     ).sudo()._trigger()
+
+    @api.model
+    def _cron_process_jobs(self, limit=JOB_BATCH_SIZE):
+        """Renders the queued jobs one by one. Every job is committed on
+        its own, so that a failing report does not roll the others back.
+        The rendering of a job runs in one transaction, the user sees the
+        job running until it is done."""
+        self.search([
+            ('state', '=', 'running'),
+            ('write_date', '<', fields.Datetime.now() - JOB_TIMEOUT),
+        ]).write({'state': 'failed',
+                  'error': _("The report generation was interrupted.")})
+        for _index in range(limit):
+            job = self._acquire_job()
+            if not job:
+                break
+            job._run()
+        remaining = self.search_count([('state', '=', 'queued')])
+        if remaining:
+            self.env.ref('hotel_management_odoo.ir_cron_hotel_report_job'
+                         )._trigger()
+
+    @api.model
+    def _acquire_job(self):
+        """Locks the oldest queued job, skipping the ones taken by other
+        workers, and marks it as running"""
+        self.env.cr.execute("""
+            SELECT id FROM hotel_report_job
+             WHERE state = 'queued'
+             ORDER BY id
+             LIMIT 1
+               FOR UPDATE SKIP LOCKED
+        """)
+        row = self.env.cr.fetchone()
+        if not row:
+            return self.browse()
+        job = self.browse(row[0])
+        job.write({'state': 'running'})
+        self.env.cr.commit()
+        return job
+
+    def _run(self):
+        """Renders the report of the job and notifies the user"""
+        self.ensure_one()
+        try:
+            content, mimetype = self._render_report()
+            attachment = self.env['ir.attachment'].create({
+                'name': '%s.%s' % (self.name, self.output_format),
+                'raw': content,
+                'mimetype': mimetype,
+                'res_model': self._name,
+                'res_id': self.id,
+            })
+            self.write({
+                'state': 'done',
+                'attachment_id': attachment.id,
+                'date_done': fields.Datetime.now(),
+            })
+        except Exception as error:
+            _logger.exception("Hotel report job %s failed", self.id)
+            self.env.cr.rollback()
+            self.write({'state': 'failed', 'error': str(error)})
+        self._notify_user()
+        self.env.cr.commit()
+
+    def _render_report(self):
+        """Returns the content and the mimetype of the report, rendered
+        with the access rights of the requesting user"""
+        wizard = self.env[self.report_model].with_user(self.user_id).create(
+            self._get_wizard_values())
+        if self.output_format == 'xlsx':
+            with tempfile.TemporaryFile() as output:
+                wizard._write_xlsx_report(output)
+                output.seek(0)
+                return output.read(), XLSX_MIMETYPE
+        data = {'booking': wizard.generate_data()}
+        report = self.env.ref(JOB_REPORTS[self.report_model])
+        content, _format = self.env['ir.actions.report'].with_user(
+            self.user_id)._render_qweb_pdf(report, res_ids=wizard.ids,
+                                           data=data)
+        return content, 'application/pdf'
+
+    def _get_wizard_values(self):
+        """Values of the report wizard the job renders"""
+        values = {'checkin': self.checkin, 'checkout': self.checkout}
+        if 'room_id' in self.env[self.report_model]._fields:
+            values['room_id'] = self.room_id.id
+        return values
+
+    def _notify_user(self):
+        """Sends the outcome of the job to the requesting user"""
+        if self.state == 'done':
+            notification = {
+                'type': 'success',
+                'title': _("Report ready"),
+                'message': _("%s is ready in Reporting > Report Jobs.",
+                             self.name),
+            }
+        else:
+            notification = {
+                'type': 'danger',
+                'title': _("Report failed"),
+                'message': _("%s could not be generated: %s",
+                             self.name, self.error),
+            }
+        self.env['bus.bus']._sendone(self.user_id.partner_id,
+                                     'simple_notification',
+                                     dict(notification, sticky=True))
@@ -19,8 +19,10 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 ###############################################################################
+from datetime import timedelta
 from odoo import api, fields, models, tools, _
 from odoo.exceptions import ValidationError
+from .room_booking_line import OCCUPYING_STATES
 
 
 class HotelRoom(models.Model):
@@ -40,17 +42,22 @@ class HotelRoom(models.Model):
                                ("reserved", "Reserved"),
                                ("occupied", "Occupied"),
                                ("unavailable", "Unavailable")],
-                               compute='_compute_status',
-                               store=True,
-                              default="available", 
+                              compute='_compute_status', store=True,
+                              index=True, default="available",
                               string="Status",
-                              help="Status of The Room",
-                              tracking=True)
+                              help="Status of the room for the current "
+                                   "night, derived from the maintenance "
+                                   "switch and the room bookings")
     is_unavailable_for_maintenance = fields.Boolean(string="Unavailable for Maintenance", 
                                                     tracking=True, 
                                                     help="Check this box to make the room unavailable for maintenance.")
     is_room_avail = fields.Boolean(default=True, string="Available",
+                                   compute='_compute_status', store=True,
+                                   index=True,
                                    help="Check if the room is available")
+    booking_line_ids = fields.One2many('room.booking.line', 'room_id',
+                                       string="Room Bookings",
+                                       help="Booking lines of the room")
     list_price = fields.Float(string='Rent', digits='Product Price',
                               help="The rent of the room.")
     uom_id = fields.Many2one('uom.uom', string='Unit of Measure',
@@ -90,6 +97,32 @@ class HotelRoom(models.Model):
     description = fields.Html(string='Description', help="Add description",
                               translate=True)
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        """New rooms add to the inventory of their type"""
+        rooms = super().create(vals_list)
+        self.env['hotel.room.type.inventory']._refresh_capacity(
+            rooms.room_type)
+        return rooms
+
+    def write(self, vals):
+        """Changing the type of a room or its maintenance moves it between
+        the inventories"""
+        room_types = self.room_type
+        res = super().write(vals)
+        if {'room_type', 'is_unavailable_for_maintenance'}.intersection(
+                vals):
+            self.env['hotel.room.type.inventory']._refresh_capacity(
+                room_types | self.room_type)
+        return res
+
+    def unlink(self):
+        """Removed rooms leave the inventory of their type"""
+        room_types = self.room_type
+        res = super().unlink()
+        self.env['hotel.room.type.inventory']._refresh_capacity(room_types)
+        return res
+
     @api.constrains("num_person")
     def _check_capacity(self):
         """Check capacity function"""
@@ -103,16 +136,141 @@ class HotelRoom(models.Model):
         if self.room_type:
             self.num_person = self.room_type.num_person
 
-    @api.depends('is_unavailable_for_maintenance')
+    @api.model
+    @api.returns('self')
+    def search_available(self, checkin, checkout, num_person=0,
+                         room_type_ids=None, floor_ids=None,
+                         exclude_line_ids=None):
+        """Returns the rooms that are free for the whole period between
+        checkin and checkout and can host at least num_person guests.
+        The rooms are fetched with a single anti-join against the
+        reserved and checked-in room booking lines.
+        :param checkin: start of the stay (datetime or string)
+        :param checkout: end of the stay (datetime or string)
+        :param num_person: minimum capacity of the room
+        :param room_type_ids: optional list of hotel.room.type ids
+        :param floor_ids: optional list of hotel.floor ids
+        :param exclude_line_ids: room booking lines to ignore, e.g. the
+            lines being edited
+        :return: hotel.room recordset, the ids of the rooms when called
+            over RPC"""
+        checkin = fields.Datetime.to_datetime(checkin)
+        checkout = fields.Datetime.to_datetime(checkout)
+        if not checkin or not checkout or checkout < checkin:
+            return self.browse()
+        self.env['room.booking.line'].flush_model(
+            ['room_id', 'checkin_date', 'checkout_date', 'state'])
+        self.flush_model(['is_unavailable_for_maintenance', 'num_person',
+                          'room_type', 'floor_id'])
+        conditions = ["room.is_unavailable_for_maintenance IS NOT TRUE",
+                      "room.num_person >= %(num_person)s"]
+        if room_type_ids:
+            conditions.append("room.room_type = ANY(%(room_type_ids)s)")
+        if floor_ids:
+            conditions.append("room.floor_id = ANY(%(floor_ids)s)")
+        self.env.cr.execute("""
+            SELECT room.id
+              FROM hotel_room room
+             WHERE %s
+               AND NOT EXISTS (
+                   SELECT 1
+                     FROM room_booking_line line
+                    WHERE line.room_id = room.id
+                      AND line.state IN %%(states)s
+                      AND line.id != ALL(%%(exclude_line_ids)s)
+                      AND tsrange(line.checkin_date, line.checkout_date, '[)')
+                          && tsrange(%%(checkin)s, %%(checkout)s, '[)'))
+             ORDER BY room.id
+        """ % " AND ".join(conditions), {
+            'num_person': num_person or 0,
+            'room_type_ids': list(room_type_ids or []),
+            'floor_ids': list(floor_ids or []),
+            'states': OCCUPYING_STATES,
+            'exclude_line_ids': list(exclude_line_ids or []),
+            'checkin': checkin,
+            'checkout': checkout,
+        })
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    @api.depends('is_unavailable_for_maintenance', 'booking_line_ids.state',
+                 'booking_line_ids.checkin_date',
+                 'booking_line_ids.checkout_date')
     def _compute_status(self):
-        """Computes the status of the room based on the maintenance switch."""
+        """Computes the status of the room for the current night: under
+        maintenance, occupied by a checked-in guest, reserved for tonight
+        or available"""
+        statuses = self._get_booking_statuses()
         for room in self:
             if room.is_unavailable_for_maintenance:
-                room.status = 'unavailable'
-                room.is_room_avail = False
+                status = 'unavailable'
             else:
-                # This doesn't account for 'reserved' or 'occupied' states.
-                # A more robust solution would check bookings.
-                # For now, we'll just set it to available.
-                room.status = 'available'
-                room.is_room_avail = True
\ No newline at end of file
+                status = statuses.get(room._origin.id, 'available')
+            room.status = status
+            room.is_room_avail = status == 'available'
+
+    def _get_booking_statuses(self, today=None):
+        """Returns the status given by the room bookings of tonight, by
+        room id. A checked-in room stays occupied until the check-out,
+        a reservation only counts for the nights it covers, the nights
+        being counted the same way as in the occupancy grid."""
+        room_ids = [room_id for room_id in self._origin.ids if room_id]
+        if not room_ids:
+            return {}
+        self.env['room.booking.line'].flush_model(
+            ['room_id', 'checkin_date', 'checkout_date', 'state'])
+        self.env.cr.execute("""
+            SELECT room_id,
+                   CASE WHEN bool_or(state = 'check_in') THEN 'occupied'
+                        ELSE 'reserved' END
+              FROM room_booking_line
+             WHERE room_id = ANY(%(room_ids)s)
+               AND state IN %(states)s
+               AND checkin_date::date <= %(today)s
+               AND (state = 'check_in'
+                    OR checkin_date::date + GREATEST(CEIL(EXTRACT(EPOCH
+                       FROM checkout_date - checkin_date) / 86400.0
+                       )::int, 1) > %(today)s)
+             GROUP BY room_id
+        """, {
+            'room_ids': room_ids,
+            'states': OCCUPYING_STATES,
+            'today': today or fields.Date.today(),
+        })
+        return dict(self.env.cr.fetchall())
+
+    @api.model
+    def _cron_rollover_status(self):
+        """Recomputes the status of the rooms whose bookings start or end
+        since the last run. The stays are found through the indexed
+        check-in and check-out dates, the other rooms keep their status."""
+        param = self.env['ir.config_parameter'].sudo()
+        today = fields.Date.today()
+        last_run = fields.Date.to_date(param.get_param(
+            'hotel_management_odoo.room_status_last_rollover'
+        )) or today - timedelta(days=1)
+        self.env['room.booking.line'].flush_model(
+            ['room_id', 'checkin_date', 'checkout_date', 'state'])
+        # A reservation ends on the check-out day or the day after it,
+        # depending on the hours, so the check-out range starts one day
+        # earlier than the check-in one
+        self.env.cr.execute("""
+            SELECT DISTINCT room_id
+              FROM room_booking_line
+             WHERE room_id IS NOT NULL
+               AND state IN %(states)s
+               AND ((checkin_date >= %(since)s AND checkin_date < %(until)s)
+                    OR (checkout_date >= %(last_run)s
+                        AND checkout_date < %(until)s))
+        """, {
+            'states': OCCUPYING_STATES,
+            'last_run': last_run,
+            'since': last_run + timedelta(days=1),
+            'until': today + timedelta(days=1),
+        })
+        rooms = self.browse([row[0] for row in self.env.cr.fetchall()])
+        if rooms:
+            self.env.add_to_compute(self._fields['status'], rooms)
+            self.env.add_to_compute(self._fields['is_room_avail'], rooms)
+            rooms.flush_recordset(['status', 'is_room_avail'])
+        param.set_param('hotel_management_odoo.room_status_last_rollover',
+                        fields.Date.to_string(today))
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: ADARSH K (odoo@cybrosys.com)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from odoo import api, fields, models, tools
+
+# Booking states whose nights are kept in the occupancy grid. Checked-out
+# and done stays stay in the grid as history, their checkout date being
+# moved to the actual departure on checkout.
+GRID_STATES = ('reserved', 'check_in', 'check_out', 'done')
+
+
+class HotelRoomOccupancy(models.Model):
+    """Materialized per room per night occupancy of the hotel, maintained
+    from the room booking lines"""
+    _name = 'hotel.room.occupancy'
+    _description = 'Room Occupancy'
+    _order = 'date, room_id'
+    _log_access = False
+
+    room_id = fields.Many2one('hotel.room', string="Room", required=True,
+                              readonly=True, ondelete='cascade',
+                              help="Occupied room")
+    date = fields.Date(string="Night", required=True, readonly=True,
+                       help="Night on which the room is occupied")
+    booking_line_id = fields.Many2one('room.booking.line',
+                                      string="Booking Line", required=True,
+                                      readonly=True, index=True,
+                                      ondelete='cascade',
+                                      help="Room line occupying the room")
+    booking_id = fields.Many2one('room.booking', string="Booking",
+                                 readonly=True, ondelete='cascade',
+                                 help="Booking occupying the room")
+    state = fields.Selection([('reserved', 'Reserved'),
+                              ('check_in', 'Check In'),
+                              ('check_out', 'Check Out'),
+                              ('done', 'Done')],
+                             string="State", readonly=True,
+                             help="State of the booking for this night")
+
+    def init(self):
+        """Month wide grids are read with a range scan on the night"""
+        tools.create_index(self.env.cr, 'hotel_room_occupancy_date_room_index',
+                           self._table, ['date', 'room_id'])
+
+    @api.model
+    def _refresh_lines(self, lines):
+        """Rebuilds the nights of the given room booking lines. Called
+        whenever the room, the dates or the booking state of the lines
+        change, so that only the touched lines are rewritten."""
+        if not lines:
+            return
+        lines.flush_recordset(['room_id', 'checkin_date', 'checkout_date',
+                               'booking_id', 'state'])
+        dates = self._clear_lines(lines)
+        self.env.cr.execute("""
+            INSERT INTO hotel_room_occupancy
+                   (room_id, date, booking_line_id, booking_id, state)
+            SELECT line.room_id, line.checkin_date::date + night,
+                   line.id, line.booking_id, line.state
+              FROM room_booking_line line,
+                   generate_series(0, GREATEST(CEIL(EXTRACT(EPOCH FROM
+                       line.checkout_date - line.checkin_date) / 86400.0
+                   )::int, 1) - 1) AS night
+             WHERE line.id = ANY(%s)
+               AND line.room_id IS NOT NULL
+               AND line.state IN %s
+         RETURNING date
+        """, [lines.ids, GRID_STATES])
+        dates.update(row[0] for row in self.env.cr.fetchall())
+        self.env['hotel.kpi.snapshot']._mark_stale(dates)
+
+    @api.model
+    def _clear_lines(self, lines):
+        """Removes the nights of the given lines from the grid
+        :return: set of the nights that were removed"""
+        self.env.cr.execute("""
+            DELETE FROM hotel_room_occupancy
+             WHERE booking_line_id = ANY(%s)
+         RETURNING date
+        """, [lines.ids])
+        self.invalidate_model()
+        return {row[0] for row in self.env.cr.fetchall()}
+
+    @api.model
+    def _rebuild(self):
+        """Rebuilds the whole grid from the room booking lines"""
+        self.env.cr.execute("TRUNCATE hotel_room_occupancy")
+        self._refresh_lines(self.env['room.booking.line'].search(
+            [('state', 'in', GRID_STATES)]))
+
+    @api.model
+    def get_occupancy_grid(self, date_from, date_to, room_ids=None):
+        """Returns the occupancy of the rooms for every night between
+        date_from and date_to (both included) with one range scan.
+        :return: dictionary mapping each room id to a dictionary of
+            {night (ISO date): {'state': ..., 'booking_id': ...}}"""
+        date_from = fields.Date.to_date(date_from)
+        date_to = fields.Date.to_date(date_to)
+        self.flush_model()
+        query = """
+            SELECT room_id, date, state, booking_id
+              FROM hotel_room_occupancy
+             WHERE date BETWEEN %s AND %s
+        """
+        params = [date_from, date_to]
+        if room_ids:
+            query += " AND room_id = ANY(%s)"
+            params.append(list(room_ids))
+        self.env.cr.execute(query, params)
+        grid = {room_id: {} for room_id in room_ids or []}
+        for room_id, date, state, booking_id in self.env.cr.fetchall():
+            grid.setdefault(room_id, {})[fields.Date.to_string(date)] = {
+                'state': state,
+                'booking_id': booking_id,
+            }
+        return grid
@@ -31,4 +31,7 @@ class HotelRoomType(models.Model):
                        help="e.g. Single, Double, Suite")
     num_person = fields.Integer(string='Capacity', required=True, default=1,
                                 help="The maximum number of persons for this room type.")
+    cleaning_effort = fields.Float(string='Cleaning Effort', default=30.0,
+                                   help="Estimated minutes needed to clean a "
+                                        "room of this type after checkout")
 
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: ADARSH K (odoo@cybrosys.com)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from collections import defaultdict
+from datetime import timedelta
+from odoo import api, fields, models, _
+from odoo.exceptions import ValidationError
+from .hotel_rate_plan import stay_nights
+from .room_booking_line import OCCUPYING_STATES
+
+# Time a reservation waits for the counters locked by another one before
+# failing; the failed transaction is retried by the request retry loop
+INVENTORY_LOCK_TIMEOUT = '2s'
+
+
+class HotelRoomTypeInventory(models.Model):
+    """Number of rooms of each type sold per night. Reservations take
+    rooms from the counters with a conditional update, so that concurrent
+    reservations of the same room type never oversell it."""
+    _name = 'hotel.room.type.inventory'
+    _description = 'Room Type Inventory'
+    _order = 'date, room_type_id'
+    _rec_name = 'room_type_id'
+    _log_access = False
+    _sql_constraints = [
+        ('room_type_date_uniq', 'unique(room_type_id, date)',
+         'The inventory of a room type is counted once per night.'),
+    ]
+
+    room_type_id = fields.Many2one('hotel.room.type', string="Room Type",
+                                   required=True, readonly=True,
+                                   ondelete='cascade')
+    date = fields.Date(string="Night", required=True, readonly=True)
+    capacity = fields.Integer(string="Capacity", readonly=True,
+                              help="Rooms of the type not under "
+                                   "maintenance")
+    sold = fields.Integer(string="Sold", readonly=True,
+                          help="Rooms of the type reserved or occupied")
+
+    @api.model
+    def _get_nights(self, lines, date_from=None):
+        """Rooms needed by the lines per room type and night
+        :return: dictionary {(room type id, night): number of rooms}"""
+        nights = defaultdict(int)
+        for line in lines:
+            if not (line.room_type_id and line.checkin_date
+                    and line.checkout_date):
+                continue
+            first_night = line.checkin_date.date()
+            for night in range(stay_nights(line.checkin_date,
+                                           line.checkout_date)):
+                date = first_night + timedelta(days=night)
+                if not date_from or date >= date_from:
+                    nights[line.room_type_id.id, date] += 1
+        return nights
+
+    @api.model
+    def _reserve(self, lines):
+        """Takes the rooms of the lines from the counters, raising when a
+        room type is sold out for one of the nights. The counters are
+        locked in a fixed order and only for a short time: a reservation
+        waiting longer, or conflicting with a concurrent commit, fails
+        with a concurrency error and its request is replayed."""
+        nights = self._get_nights(lines)
+        if not nights:
+            return
+        values = ", ".join(["(%s, %s::date, %s)"] * len(nights))
+        params = [param for (room_type_id, date), quantity in nights.items()
+                  for param in (room_type_id, date, quantity)]
+        self.env['hotel.room'].flush_model(
+            ['room_type', 'is_unavailable_for_maintenance'])
+        self.env.cr.execute("SET LOCAL lock_timeout = %s",
+                            [INVENTORY_LOCK_TIMEOUT])
+        self.env.cr.execute("""
+            INSERT INTO hotel_room_type_inventory
+                   (room_type_id, date, capacity, sold)
+            SELECT night.room_type_id, night.date, (
+                       SELECT count(*) FROM hotel_room room
+                        WHERE room.room_type = night.room_type_id
+                          AND NOT COALESCE(
+                              room.is_unavailable_for_maintenance, FALSE)),
+                   0
+              FROM (VALUES %s) AS night(room_type_id, date, quantity)
+            ON CONFLICT (room_type_id, date) DO NOTHING
+        """ % values, params)
+        self.env.cr.execute("""
+            SELECT inventory.id
+              FROM hotel_room_type_inventory inventory
+              JOIN (VALUES %s) AS night(room_type_id, date, quantity)
+                ON inventory.room_type_id = night.room_type_id
+               AND inventory.date = night.date
+             ORDER BY inventory.room_type_id, inventory.date
+               FOR UPDATE OF inventory
+        """ % values, params)
+        self.env.cr.execute("""
+            UPDATE hotel_room_type_inventory inventory
+               SET sold = inventory.sold + night.quantity
+              FROM (VALUES %s) AS night(room_type_id, date, quantity)
+             WHERE inventory.room_type_id = night.room_type_id
+               AND inventory.date = night.date
+               AND inventory.sold + night.quantity <= inventory.capacity
+         RETURNING inventory.room_type_id, inventory.date
+        """ % values, params)
+        updated = set(self.env.cr.fetchall())
+        self.env.cr.execute("SET LOCAL lock_timeout TO DEFAULT")
+        self.invalidate_model()
+        sold_out = sorted(set(nights) - updated, key=lambda night: night[1])
+        if sold_out:
+            room_type = self.env['hotel.room.type'].browse(sold_out[0][0])
+            raise ValidationError(_(
+                "No %(room_type)s room is left for the night of %(date)s.",
+                room_type=room_type.name, date=sold_out[0][1]))
+
+    @api.model
+    def _release(self, lines, date_from=None):
+        """Gives the rooms of the lines back to the counters
+        :param date_from: only release the nights from this day"""
+        nights = self._get_nights(lines, date_from)
+        if not nights:
+            return
+        self.env.cr.execute("SET LOCAL lock_timeout = %s",
+                            [INVENTORY_LOCK_TIMEOUT])
+        self.env.cr.execute("""
+            UPDATE hotel_room_type_inventory inventory
+               SET sold = GREATEST(inventory.sold - night.quantity, 0)
+              FROM (VALUES %s) AS night(room_type_id, date, quantity)
+             WHERE inventory.room_type_id = night.room_type_id
+               AND inventory.date = night.date
+        """ % ", ".join(["(%s, %s::date, %s)"] * len(nights)),
+            [param for (room_type_id, date), quantity in nights.items()
+             for param in (room_type_id, date, quantity)])
+        self.env.cr.execute("SET LOCAL lock_timeout TO DEFAULT")
+        self.invalidate_model()
+
+    @api.model
+    def _refresh_capacity(self, room_types):
+        """Counts again the rooms of the types for the coming nights"""
+        if not room_types:
+            return
+        self.env['hotel.room'].flush_model(
+            ['room_type', 'is_unavailable_for_maintenance'])
+        self.env.cr.execute("""
+            UPDATE hotel_room_type_inventory inventory
+               SET capacity = (
+                   SELECT count(*) FROM hotel_room room
+                    WHERE room.room_type = inventory.room_type_id
+                      AND NOT COALESCE(
+                          room.is_unavailable_for_maintenance, FALSE))
+             WHERE inventory.room_type_id = ANY(%s)
+               AND inventory.date >= %s
+        """, [room_types.ids, fields.Date.today()])
+        self.invalidate_model()
+
+    @api.model
+    def _rebuild(self):
+        """Rebuilds the counters from the reserved and checked-in lines"""
+        self.env.cr.execute("DELETE FROM hotel_room_type_inventory")
+        self.invalidate_model()
+        nights = self._get_nights(self.env['room.booking.line'].search(
+            [('state', 'in', OCCUPYING_STATES)]))
+        room_types = self.env['hotel.room.type'].browse(
+            {room_type_id for room_type_id, _date in nights})
+        capacity = dict(self.env['hotel.room']._read_group(
+            [('room_type', 'in', room_types.ids),
+             ('is_unavailable_for_maintenance', '=', False)],
+            ['room_type'], ['__count']))
+        self.create([{
+            'room_type_id': room_type_id,
+            'date': date,
+            'capacity': capacity.get(room_types.browse(room_type_id), 0),
+            'sold': quantity,
+        } for (room_type_id, date), quantity in nights.items()])
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: ADARSH K (odoo@cybrosys.com)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from odoo import api, models
+
+
+class IrSequence(models.Model):
+    """Inherited ir.sequence to take a block of numbers at once"""
+    _inherit = 'ir.sequence'
+
+    def _next_block(self, count):
+        """Returns the next count values of the sequence, taking the
+        numbers with one query instead of one per value"""
+        self.ensure_one()
+        if count <= 0:
+            return []
+        if self.use_date_range or count == 1:
+            return [self._next() for _index in range(count)]
+        if self.implementation == 'standard':
+            self.env.cr.execute(
+                "SELECT nextval(%s) FROM generate_series(1, %s)",
+                ['ir_sequence_%03d' % self.id, count])
+            numbers = [row[0] for row in self.env.cr.fetchall()]
+        else:
+            self.flush_recordset(['number_next'])
+            self.env.cr.execute("""
+                UPDATE ir_sequence
+                   SET number_next = number_next + number_increment * %s
+                 WHERE id = %s
+             RETURNING number_next - number_increment * %s
+            """, [count, self.id, count])
+            first = self.env.cr.fetchone()[0]
+            self.invalidate_recordset(['number_next'])
+            numbers = [first + index * self.number_increment
+                       for index in range(count)]
+        return [self.get_next_char(number) for number in numbers]
+
+    @api.model
+    def _next_block_by_code(self, code, count):
+        """Block counterpart of next_by_code, returning count values of the
+        sequence of the code"""
+        self.check_access('read')
+        company_id = self.env.company.id
+        sequence = self.search([('code', '=', code),
+                                ('company_id', 'in', [company_id, False])],
+                               order='company_id', limit=1)
+        if not sequence:
+            return [False] * count
+        return sequence._next_block(count)
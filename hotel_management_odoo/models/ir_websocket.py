@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: ADARSH K (odoo@cybrosys.com)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from odoo import models
+
+
+class IrWebsocket(models.AbstractModel):
+    """Subscribes the kitchen staff to the orders of the kitchen display"""
+    _inherit = 'ir.websocket'
+
+    def _build_bus_channel_list(self, channels):
+        """Adds the kitchen channel for the members of the kitchen staff"""
+        if self.env.uid and self.env.user.has_group(
+                'hotel_management_odoo.hotel_group_kitchen'):
+            channels = list(channels)
+            channels.append((self.env.ref(
+                'hotel_management_odoo.hotel_group_kitchen'),
+                'hotel_kitchen'))
+        return super()._build_bus_channel_list(channels)
@@ -19,10 +19,24 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 ###############################################################################
-from datetime import datetime, timedelta
-from odoo import api, fields, models, _
+from collections import defaultdict
+from datetime import timedelta
+from odoo import api, Command, fields, models, _
 from odoo.exceptions import ValidationError
-from odoo.tools.safe_eval import pytz
+from odoo.tools import float_compare, split_every
+from .room_booking_line import OCCUPYING_STATES
+
+# Booking line families: product type of the invoice lines, One2many field
+# on the booking and field holding the product of the line.
+LINE_FAMILIES = [
+    ('room', 'room_line_ids', 'room_id'),
+    ('food', 'food_order_line_ids', 'food_id'),
+    ('service', 'service_line_ids', 'service_id'),
+    ('fleet', 'vehicle_line_ids', 'fleet_id'),
+    ('event', 'event_line_ids', 'event_id'),
+]
+# Number of bookings invoiced by one account.move create
+INVOICE_BATCH_SIZE = 100
 
 
 class RoomBooking(models.Model):
@@ -86,6 +100,9 @@ class RoomBooking(models.Model):
                                        string="Invoice",
                                        help="Indicates the invoice",
                                        copy=False)
+    invoice_ids = fields.One2many('account.move', 'hotel_booking_id',
+                                  string="Invoices", copy=False,
+                                  help="Invoices of the booking")
     duration_visible = fields.Float(string="Duration",
                                     help="A dummy field for Duration")
     need_service = fields.Boolean(default=False, string="Need Service",
@@ -140,6 +157,15 @@ class RoomBooking(models.Model):
                               domain="['|', ('company_id', '=', False), "
                                      "('company_id', '=',"
                                      " company_id)]")
+    rate_plan_id = fields.Many2one('hotel.rate.plan', string="Rate Plan",
+                                   tracking=1,
+                                   help="Rate plan pricing the nights of the "
+                                        "rooms, the rent of the room is "
+                                        "used without plan")
+    import_id = fields.Many2one('hotel.booking.import', string="Import",
+                                readonly=True, copy=False,
+                                index='btree_not_null', ondelete='set null',
+                                help="Import the booking was created by")
     pricelist_id = fields.Many2one(comodel_name='product.pricelist',
                                    string="Pricelist",
                                    compute='_compute_pricelist_id',
@@ -171,59 +197,90 @@ class RoomBooking(models.Model):
                                    help="The total Amount including Tax",
                                    compute='_compute_amount_untaxed',
                                    tracking=4)
+    payment_state = fields.Selection(
+        selection=[('no_invoice', 'Not Invoiced'),
+                   ('not_paid', 'Not Paid'),
+                   ('partial', 'Partially Paid'),
+                   ('paid', 'Paid')],
+        string="Payment Status", compute='_compute_payment_state',
+        store=True, index=True, copy=False,
+        help="Payment status of the invoices of the booking")
+    amount_paid = fields.Monetary(string="Amount Paid",
+                                  compute='_compute_payment_state',
+                                  store=True, copy=False,
+                                  help="Amount paid on the invoices")
+    amount_residual = fields.Monetary(string="Amount Due",
+                                      compute='_compute_payment_state',
+                                      store=True, copy=False,
+                                      help="Amount left to pay on the "
+                                           "invoices")
     amount_untaxed_room = fields.Monetary(string="Room Untaxed",
                                           help="Untaxed Amount for Room",
-                                          compute='_compute_amount_untaxed',
+                                          compute='_compute_amount_room',
+                                          store=True,
                                           tracking=5)
     amount_untaxed_food = fields.Monetary(string="Food Untaxed",
                                           help="Untaxed Amount for Food",
-                                          compute='_compute_amount_untaxed',
+                                          compute='_compute_amount_food',
+                                          store=True,
                                           tracking=5)
     amount_untaxed_event = fields.Monetary(string="Event Untaxed",
                                            help="Untaxed Amount for Event",
-                                           compute='_compute_amount_untaxed',
+                                           compute='_compute_amount_event',
+                                           store=True,
                                            tracking=5)
     amount_untaxed_service = fields.Monetary(
         string="Service Untaxed", help="Untaxed Amount for Service",
-        compute='_compute_amount_untaxed', tracking=5)
+        compute='_compute_amount_service', store=True, tracking=5)
     amount_untaxed_fleet = fields.Monetary(string="Amount Untaxed",
                                            help="Untaxed amount for Fleet",
-                                           compute='_compute_amount_untaxed',
+                                           compute='_compute_amount_fleet',
+                                           store=True,
                                            tracking=5)
     amount_taxed_room = fields.Monetary(string="Rom Tax", help="Tax for Room",
-                                        compute='_compute_amount_untaxed',
+                                        compute='_compute_amount_room',
+                                        store=True,
                                         tracking=5)
     amount_taxed_food = fields.Monetary(string="Food Tax", help="Tax for Food",
-                                        compute='_compute_amount_untaxed',
+                                        compute='_compute_amount_food',
+                                        store=True,
                                         tracking=5)
     amount_taxed_event = fields.Monetary(string="Event Tax",
                                          help="Tax for Event",
-                                         compute='_compute_amount_untaxed',
+                                         compute='_compute_amount_event',
+                                         store=True,
                                          tracking=5)
     amount_taxed_service = fields.Monetary(string="Service Tax",
-                                           compute='_compute_amount_untaxed',
+                                           compute='_compute_amount_service',
+                                           store=True,
                                            help="Tax for Service", tracking=5)
     amount_taxed_fleet = fields.Monetary(string="Fleet Tax",
-                                         compute='_compute_amount_untaxed',
+                                         compute='_compute_amount_fleet',
+                                         store=True,
                                          help="Tax for Fleet", tracking=5)
     amount_total_room = fields.Monetary(string="Total Amount for Room",
-                                        compute='_compute_amount_untaxed',
+                                        compute='_compute_amount_room',
+                                        store=True,
                                         help="This is the Total Amount for "
                                              "Room", tracking=5)
     amount_total_food = fields.Monetary(string="Total Amount for Food",
-                                        compute='_compute_amount_untaxed',
+                                        compute='_compute_amount_food',
+                                        store=True,
                                         help="This is the Total Amount for "
                                              "Food", tracking=5)
     amount_total_event = fields.Monetary(string="Total Amount for Event",
-                                         compute='_compute_amount_untaxed',
+                                         compute='_compute_amount_event',
+                                         store=True,
                                          help="This is the Total Amount for "
                                               "Event", tracking=5)
     amount_total_service = fields.Monetary(string="Total Amount for Service",
-                                           compute='_compute_amount_untaxed',
+                                           compute='_compute_amount_service',
+                                           store=True,
                                            help="This is the Total Amount for "
                                                 "Service", tracking=5)
     amount_total_fleet = fields.Monetary(string="Total Amount for Fleet",
-                                         compute='_compute_amount_untaxed',
+                                         compute='_compute_amount_fleet',
+                                         store=True,
                                          help="This is the Total Amount for "
                                               "Fleet", tracking=5)
     
@@ -302,14 +359,47 @@ class RoomBooking(models.Model):
                 f"💰 {symbol}{rec.amount_total}"
             )
 
-    @api.model
+    @api.model_create_multi
     def create(self, vals_list):
-        """Sequence Generation"""
-        if vals_list.get('name', 'New') == 'New':
-            vals_list['name'] = self.env['ir.sequence'].next_by_code(
-                'room.booking')
+        """Sequence Generation, the folio numbers of all the new bookings
+        are taken from the sequence in one block"""
+        unnamed = [vals for vals in vals_list
+                   if vals.get('name', 'New') == 'New']
+        names = self.env['ir.sequence']._next_block_by_code(
+            'room.booking', len(unnamed))
+        for vals, name in zip(unnamed, names):
+            vals['name'] = name
+        self.env['hotel.dashboard']._invalidate_cache()
         return super().create(vals_list)
 
+    def write(self, vals):
+        """Reserve, check-in, check-out and cancel move the room nights in
+        or out of the occupancy grid, and the food orders of closed
+        bookings out of the kitchen displays"""
+        res = super().write(vals)
+        if 'state' in vals:
+            self.env['hotel.room.occupancy']._refresh_lines(
+                self.room_line_ids)
+            self.food_order_line_ids._notify_kitchen()
+        self.env['hotel.dashboard']._invalidate_cache()
+        return res
+
+    def unlink(self):
+        """Refresh the dashboard tiles, and drop the food orders deleted
+        with the bookings from the kitchen displays. The lines are deleted
+        by the database cascade, so the rooms of the reserved and
+        checked-in lines are given back to the inventory here, and the
+        seats of the event lines to their events."""
+        self.env['hotel.dashboard']._invalidate_cache()
+        self.env['hotel.room.type.inventory']._release(
+            self.room_line_ids.filtered(
+                lambda line: line.state in OCCUPYING_STATES))
+        self.env['event.event']._allocate_hotel_seats(
+            self.event_line_ids._get_seat_quantities(sign=-1))
+        self.food_order_line_ids._notify_kitchen_removed()
+        self.food_order_line_ids._mark_snapshots_stale()
+        return super().unlink()
+
     @api.depends('partner_id')
     def _compute_user_id(self):
         """Computes the User id"""
@@ -319,10 +409,44 @@ class RoomBooking(models.Model):
                     'invoice'] if order.partner_id else False
 
     def _compute_invoice_count(self):
-        """Compute the invoice count"""
+        """Compute the invoice count of all the bookings with one query"""
+        counts = dict(self.env['account.move']._read_group(
+            [('hotel_booking_id', 'in', self.ids)],
+            ['hotel_booking_id'], ['__count']))
+        for record in self:
+            record.invoice_count = counts.get(record, 0)
+
+    @api.depends('invoice_ids.state', 'invoice_ids.move_type',
+                 'invoice_ids.amount_total', 'invoice_ids.amount_residual')
+    def _compute_payment_state(self):
+        """Sums the invoices of all the bookings with one read_group, so
+        that the payment state is an indexed column of the booking and
+        follows the reconciliation of the invoices"""
+        totals = defaultdict(lambda: [0.0, 0.0])
+        for booking, move_type, total, residual in self.env[
+                'account.move']._read_group(
+                [('hotel_booking_id', 'in', self._origin.ids),
+                 ('state', '!=', 'cancel')],
+                ['hotel_booking_id', 'move_type'],
+                ['amount_total:sum', 'amount_residual:sum']):
+            sign = -1 if move_type == 'out_refund' else 1
+            totals[booking.id][0] += sign * total
+            totals[booking.id][1] += sign * residual
         for record in self:
-            record.invoice_count = self.env['account.move'].search_count(
-                [('ref', '=', self.name)])
+            if record._origin.id not in totals:
+                record.payment_state = 'no_invoice'
+                record.amount_paid = record.amount_residual = 0.0
+                continue
+            total, residual = totals[record._origin.id]
+            currency = record.currency_id or record.company_id.currency_id
+            record.amount_paid = total - residual
+            record.amount_residual = residual
+            if currency.compare_amounts(residual, 0.0) <= 0:
+                record.payment_state = 'paid'
+            elif currency.compare_amounts(total - residual, 0.0) <= 0:
+                record.payment_state = 'not_paid'
+            else:
+                record.payment_state = 'partial'
 
     @api.depends('partner_id')
     def _compute_pricelist_id(self):
@@ -334,128 +458,91 @@ class RoomBooking(models.Model):
             order = order.with_company(order.company_id)
             order.pricelist_id = order.partner_id.property_product_pricelist
 
+    @api.depends('amount_untaxed_room', 'amount_taxed_room',
+                 'amount_total_room', 'amount_untaxed_food',
+                 'amount_taxed_food', 'amount_total_food',
+                 'amount_untaxed_service', 'amount_taxed_service',
+                 'amount_total_service', 'amount_untaxed_fleet',
+                 'amount_taxed_fleet', 'amount_total_fleet',
+                 'amount_untaxed_event', 'amount_taxed_event',
+                 'amount_total_event')
+    def _compute_amount_untaxed(self):
+        """Compute the total amounts of the Sale Order from the stored
+        amounts of each line family"""
+        for rec in self:
+            rec.amount_untaxed = sum(
+                rec['amount_untaxed_%s' % family]
+                for family, line_field, product_field in LINE_FAMILIES)
+            rec.amount_tax = sum(
+                rec['amount_taxed_%s' % family]
+                for family, line_field, product_field in LINE_FAMILIES)
+            rec.amount_total = sum(
+                rec['amount_total_%s' % family]
+                for family, line_field, product_field in LINE_FAMILIES)
+
     @api.depends('room_line_ids.price_subtotal', 'room_line_ids.price_tax',
-                 'room_line_ids.price_total',
-                 'food_order_line_ids.price_subtotal',
+                 'room_line_ids.price_total')
+    def _compute_amount_room(self):
+        """Compute the amounts of the room lines"""
+        self._compute_family_amounts('room', 'room_line_ids')
+
+    @api.depends('food_order_line_ids.price_subtotal',
                  'food_order_line_ids.price_tax',
-                 'food_order_line_ids.price_total',
-                 'service_line_ids.price_subtotal',
-                 'service_line_ids.price_tax', 'service_line_ids.price_total',
-                 'vehicle_line_ids.price_subtotal',
-                 'vehicle_line_ids.price_tax', 'vehicle_line_ids.price_total',
-                 'event_line_ids.price_subtotal', 'event_line_ids.price_tax',
-                 'event_line_ids.price_total',
-                 )
-    def _compute_amount_untaxed(self, flag=False):
-        """Compute the total amounts of the Sale Order"""
-        amount_untaxed_room = 0.0
-        amount_untaxed_food = 0.0
-        amount_untaxed_fleet = 0.0
-        amount_untaxed_event = 0.0
-        amount_untaxed_service = 0.0
-        amount_taxed_room = 0.0
-        amount_taxed_food = 0.0
-        amount_taxed_fleet = 0.0
-        amount_taxed_event = 0.0
-        amount_taxed_service = 0.0
-        amount_total_room = 0.0
-        amount_total_food = 0.0
-        amount_total_fleet = 0.0
-        amount_total_event = 0.0
-        amount_total_service = 0.0
-        room_lines = self.room_line_ids
-        food_lines = self.food_order_line_ids
-        service_lines = self.service_line_ids
-        fleet_lines = self.vehicle_line_ids
-        event_lines = self.event_line_ids
-        booking_list = []
-        account_move_line = self.env['account.move.line'].search_read(
-            domain=[('ref', '=', self.name),
-                    ('display_type', '!=', 'payment_term')],
-            fields=['name', 'quantity', 'price_unit', 'product_type'], )
-        for rec in account_move_line:
-            del rec['id']
-        if room_lines:
-            amount_untaxed_room += sum(room_lines.mapped('price_subtotal'))
-            amount_taxed_room += sum(room_lines.mapped('price_tax'))
-            amount_total_room += sum(room_lines.mapped('price_total'))
-            for room in room_lines:
-                booking_dict = {'name': room.room_id.name,
-                                'quantity': room.uom_qty,
-                                'price_unit': room.price_unit,
-                                'product_type': 'room'}
-                if booking_dict not in account_move_line:
-                    if not account_move_line:
-                        booking_list.append(booking_dict)
-                    else:
-                        for rec in account_move_line:
-                            if rec['product_type'] == 'room':
-                                if booking_dict['name'] == rec['name'] and \
-                                        booking_dict['price_unit'] == rec[
-                                    'price_unit'] and booking_dict['quantity']\
-                                        != rec['quantity']:
-                                    booking_list.append(
-                                        {'name': room.room_id.name,
-                                         "quantity": booking_dict[
-                                                         'quantity'] - rec[
-                                                         'quantity'],
-                                         "price_unit": room.price_unit,
-                                         "product_type": 'room'})
-                                else:
-                                    booking_list.append(booking_dict)
-                    if flag:
-                        room.booking_line_visible = True
-        if food_lines:
-            for food in food_lines:
-                booking_list.append(self.create_list(food))
-            amount_untaxed_food += sum(food_lines.mapped('price_subtotal'))
-            amount_taxed_food += sum(food_lines.mapped('price_tax'))
-            amount_total_food += sum(food_lines.mapped('price_total'))
-        if service_lines:
-            for service in service_lines:
-                booking_list.append(self.create_list(service))
-            amount_untaxed_service += sum(
-                service_lines.mapped('price_subtotal'))
-            amount_taxed_service += sum(service_lines.mapped('price_tax'))
-            amount_total_service += sum(service_lines.mapped('price_total'))
-        if fleet_lines:
-            for fleet in fleet_lines:
-                booking_list.append(self.create_list(fleet))
-            amount_untaxed_fleet += sum(fleet_lines.mapped('price_subtotal'))
-            amount_taxed_fleet += sum(fleet_lines.mapped('price_tax'))
-            amount_total_fleet += sum(fleet_lines.mapped('price_total'))
-        if event_lines:
-            for event in event_lines:
-                booking_list.append(self.create_list(event))
-            amount_untaxed_event += sum(event_lines.mapped('price_subtotal'))
-            amount_taxed_event += sum(event_lines.mapped('price_tax'))
-            amount_total_event += sum(event_lines.mapped('price_total'))
+                 'food_order_line_ids.price_total')
+    def _compute_amount_food(self):
+        """Compute the amounts of the food lines"""
+        self._compute_family_amounts('food', 'food_order_line_ids')
+
+    @api.depends('service_line_ids.price_subtotal',
+                 'service_line_ids.price_tax', 'service_line_ids.price_total')
+    def _compute_amount_service(self):
+        """Compute the amounts of the service lines"""
+        self._compute_family_amounts('service', 'service_line_ids')
+
+    @api.depends('vehicle_line_ids.price_subtotal',
+                 'vehicle_line_ids.price_tax', 'vehicle_line_ids.price_total')
+    def _compute_amount_fleet(self):
+        """Compute the amounts of the fleet lines"""
+        self._compute_family_amounts('fleet', 'vehicle_line_ids')
+
+    @api.depends('event_line_ids.price_subtotal', 'event_line_ids.price_tax',
+                 'event_line_ids.price_total')
+    def _compute_amount_event(self):
+        """Compute the amounts of the event lines"""
+        self._compute_family_amounts('event', 'event_line_ids')
+
+    def _compute_family_amounts(self, family, line_field):
+        """Writes the untaxed, tax and total amounts of one line family.
+        Each family has its own compute, so that changing a line only
+        recomputes the amounts of its family and the grand totals."""
+        amounts = self._get_line_amounts(line_field)
         for rec in self:
-            rec.amount_untaxed = amount_untaxed_food + amount_untaxed_room + \
-                                 amount_untaxed_fleet + \
-                                 amount_untaxed_event + amount_untaxed_service
-            rec.amount_untaxed_food = amount_untaxed_food
-            rec.amount_untaxed_room = amount_untaxed_room
-            rec.amount_untaxed_fleet = amount_untaxed_fleet
-            rec.amount_untaxed_event = amount_untaxed_event
-            rec.amount_untaxed_service = amount_untaxed_service
-            rec.amount_tax = (amount_taxed_food + amount_taxed_room
-                              + amount_taxed_fleet
-                              + amount_taxed_event + amount_taxed_service)
-            rec.amount_taxed_food = amount_taxed_food
-            rec.amount_taxed_room = amount_taxed_room
-            rec.amount_taxed_fleet = amount_taxed_fleet
-            rec.amount_taxed_event = amount_taxed_event
-            rec.amount_taxed_service = amount_taxed_service
-            rec.amount_total = (amount_total_food + amount_total_room
-                                + amount_total_fleet + amount_total_event
-                                + amount_total_service)
-            rec.amount_total_food = amount_total_food
-            rec.amount_total_room = amount_total_room
-            rec.amount_total_fleet = amount_total_fleet
-            rec.amount_total_event = amount_total_event
-            rec.amount_total_service = amount_total_service
-        return booking_list
+            subtotal, tax, total = amounts.get(rec.id, (0.0, 0.0, 0.0))
+            rec['amount_untaxed_%s' % family] = subtotal
+            rec['amount_taxed_%s' % family] = tax
+            rec['amount_total_%s' % family] = total
+
+    def _get_line_amounts(self, line_field):
+        """Returns the untaxed, tax and total amounts of one family of
+        booking lines per booking. Saved bookings are aggregated with a
+        single grouped query, new records (onchange) from the cache.
+        :param line_field: name of the One2many holding the lines
+        :return: dictionary {booking id: (untaxed, tax, total)}"""
+        saved = self.filtered('id')
+        amounts = {}
+        if saved:
+            line_model = self.env[self._fields[line_field].comodel_name]
+            for booking, subtotal, tax, total in line_model._read_group(
+                    [('booking_id', 'in', saved.ids)], ['booking_id'],
+                    ['price_subtotal:sum', 'price_tax:sum',
+                     'price_total:sum']):
+                amounts[booking.id] = (subtotal, tax, total)
+        for rec in self - saved:
+            lines = rec[line_field]
+            amounts[rec.id] = (sum(lines.mapped('price_subtotal')),
+                               sum(lines.mapped('price_tax')),
+                               sum(lines.mapped('price_total')))
+        return amounts
 
     @api.onchange('need_food')
     def _onchange_need_food(self):
@@ -491,6 +578,8 @@ class RoomBooking(models.Model):
                   'service_line_ids', 'vehicle_line_ids', 'event_line_ids')
     def _onchange_room_line_ids(self):
         """Invokes the Compute amounts function"""
+        for family, line_field, product_field in LINE_FAMILIES:
+            self._compute_family_amounts(family, line_field)
         self._compute_amount_untaxed()
         self.invoice_button_visible = False
 
@@ -505,7 +594,7 @@ class RoomBooking(models.Model):
         for record in self:
             # Create a set of unique ids
             ids = set()
-            for line in record.room_line_ids:
+            for line in record.room_line_ids.filtered('room_id'):
                 if line.room_id.id in ids:
                     raise ValidationError(
                         _(
@@ -516,39 +605,57 @@ class RoomBooking(models.Model):
                     )
                 ids.add(line.room_id.id)
 
-    def create_list(self, line_ids):
-        """Returns a Dictionary containing the Booking line Values"""
-        account_move_line = self.env['account.move.line'].search_read(
-            domain=[('ref', '=', self.name),
-                    ('display_type', '!=', 'payment_term')],
-            fields=['name', 'quantity', 'price_unit', 'product_type'], )
-        for rec in account_move_line:
-            del rec['id']
-        booking_dict = {}
-        for line in line_ids:
-            name = ""
-            product_type = ""
-            if line_ids._name == 'food.booking.line':
-                name = line.food_id.name
-                product_type = 'food'
-            elif line_ids._name == 'fleet.booking.line':
-                name = line.fleet_id.name
-                product_type = 'fleet'
-            elif line_ids._name == 'service.booking.line':
-                name = line.service_id.name
-                product_type = 'service'
-            elif line_ids._name == 'event.booking.line':
-                name = line.event_id.name
-                product_type = 'event'
-            booking_dict = {'name': name,
-                            'quantity': line.uom_qty,
-                            'price_unit': line.price_unit,
-                            'product_type': product_type}
-        return booking_dict
+    def _get_invoice_line_values(self):
+        """Returns the booking lines that are not invoiced yet, as invoice
+        line values grouped by booking. The lines already invoiced for all
+        the bookings of self are read at once from their invoices and only
+        the remaining quantity of each line is returned. Invoice lines are
+        matched to their booking line, the ones invoiced before the booking
+        line was recorded on the invoice line by product type and name.
+        :return: dictionary {booking id: [invoice line values]}"""
+        invoiced = defaultdict(lambda: defaultdict(float))
+        moves = self.env['account.move'].search(
+            [('hotel_booking_id', 'in', self.ids)])
+        for line in self.env['account.move.line'].search_read(
+                domain=[('move_id', 'in', moves.ids),
+                        ('display_type', '=', 'product')],
+                fields=['move_id', 'name', 'quantity', 'product_type',
+                        'hotel_line_ref']):
+            booking = moves.browse(line['move_id'][0]).hotel_booking_id
+            key = line['hotel_line_ref'] or (line['product_type'],
+                                             line['name'])
+            invoiced[booking.id][key] += line['quantity']
+        precision = self.env['decimal.precision'].precision_get(
+            'Product Unit of Measure')
+        values = {}
+        for rec in self:
+            rec_invoiced = invoiced[rec.id]
+            values[rec.id] = []
+            for family, line_field, product_field in LINE_FAMILIES:
+                for line in rec[line_field]:
+                    reference = '%s,%s' % (line._name, line.id)
+                    legacy_key = (family, line[product_field].name)
+                    quantity = line.uom_qty - rec_invoiced[reference] \
+                        - rec_invoiced[legacy_key]
+                    rec_invoiced[legacy_key] = max(
+                        rec_invoiced[legacy_key] - line.uom_qty, 0.0)
+                    if float_compare(quantity, 0.0,
+                                     precision_digits=precision) <= 0:
+                        continue
+                    values[rec.id].append({
+                        'name': legacy_key[1],
+                        'quantity': quantity,
+                        'price_unit': line.price_unit,
+                        'product_type': family,
+                        'hotel_line_ref': reference,
+                    })
+        return values
 
     def action_reserve(self):
-        """Button Reserve Function"""
-        if self.state == 'reserved':
+        """Button Reserve Function, reserves all the rooms of the bookings
+        at once"""
+        bookings = self.filtered(lambda booking: booking.state != 'reserved')
+        if not bookings:
             message = _("Room Already Reserved.")
             return {
                 'type': 'ir.actions.client',
@@ -559,38 +666,56 @@ class RoomBooking(models.Model):
                     'next': {'type': 'ir.actions.act_window_close'},
                 }
             }
-        if self.room_line_ids:
-            for room in self.room_line_ids:
-                if room.room_id.status == 'unavailable':
-                    raise ValidationError(_("The room '%s' is currently unavailable for maintenance and cannot be reserved.") % room.room_id.name)
-                room.room_id.write({
-                    'status': 'reserved',
-                })
-                room.room_id.is_room_avail = False
-            self.write({"state": "reserved"})
-            return {
-                'type': 'ir.actions.client',
-                'tag': 'display_notification',
-                'params': {
-                    'type': 'success',
-                    'message': "Rooms reserved Successfully!",
-                    'next': {'type': 'ir.actions.act_window_close'},
-                }
+        bookings._check_transition(['draft'])
+        bookings._check_room_lines()
+        unavailable = self.env['hotel.room'].search([
+            ('id', 'in', bookings.room_line_ids.room_id.ids),
+            ('status', '=', 'unavailable'),
+        ])
+        if unavailable:
+            raise ValidationError(_(
+                "The rooms %s are currently unavailable for maintenance and "
+                "cannot be reserved.", ", ".join(unavailable.mapped('name'))))
+        self.env['hotel.room.type.inventory']._reserve(
+            bookings.room_line_ids)
+        bookings.write({"state": "reserved"})
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'type': 'success',
+                'message': "Rooms reserved Successfully!",
+                'next': {'type': 'ir.actions.act_window_close'},
             }
-        raise ValidationError(_("Please Enter Room Details"))
+        }
 
     def action_cancel(self):
         """
         @param self: object pointer
         """
-        if self.room_line_ids:
-            for room in self.room_line_ids:
-                room.room_id.write({
-                    'status': 'available',
-                })
-                room.room_id.is_room_avail = True
+        self._check_transition(['draft', 'reserved'])
+        self.env['hotel.room.type.inventory']._release(self.filtered(
+            lambda booking: booking.state == 'reserved').room_line_ids)
+        self.env['event.event']._allocate_hotel_seats(
+            self.event_line_ids._get_seat_quantities(sign=-1))
         self.write({"state": "cancel"})
 
+    def _check_transition(self, states):
+        """Raises if one of the bookings is not in one of the states"""
+        wrong = self.filtered(lambda booking: booking.state not in states)
+        if wrong:
+            raise ValidationError(_(
+                "The bookings %s cannot be processed in their current state.",
+                ", ".join(wrong.mapped('name'))))
+
+    def _check_room_lines(self):
+        """Raises if one of the bookings has no room line"""
+        missing = self.filtered(lambda booking: not booking.room_line_ids)
+        if missing:
+            raise ValidationError(_(
+                "Please Enter Room Details for %s",
+                ", ".join(missing.mapped('name'))))
+
     def action_maintenance_request(self):
         """
         Function that handles the maintenance request
@@ -620,58 +745,43 @@ class RoomBooking(models.Model):
         raise ValidationError(_("Please Enter Room Details"))
 
     def action_done(self):
-        """Button action_confirm function"""
-        for rec in self.env['account.move'].search(
-                [('ref', '=', self.name)]):
-            if rec.payment_state != 'not_paid':
-                self.write({"state": "done"})
-                self.is_checkin = False
-                if self.room_line_ids:
-                    return {
-                        'type': 'ir.actions.client',
-                        'tag': 'display_notification',
-                        'params': {
-                            'type': 'success',
-                            'message': "Booking Checked Out Successfully!",
-                            'next': {'type': 'ir.actions.act_window_close'},
-                        }
-                    }
+        """Button action_confirm function, the bookings are closed once
+        their invoices are paid"""
+        if self.filtered(lambda booking: booking.payment_state == 'not_paid'):
             raise ValidationError(_('Your Invoice is Due for Payment.'))
-        self.write({"state": "done"})
+        self.write({"state": "done", "is_checkin": False})
+        if self.room_line_ids:
+            return {
+                'type': 'ir.actions.client',
+                'tag': 'display_notification',
+                'params': {
+                    'type': 'success',
+                    'message': "Booking Checked Out Successfully!",
+                    'next': {'type': 'ir.actions.act_window_close'},
+                }
+            }
 
     def action_checkout(self):
-        """Button action_heck_out function"""
+        """Button action_heck_out function, the vacated rooms of all the
+        bookings are queued for housekeeping at once"""
+        self._check_transition(['check_in'])
+        self.env['hotel.room.type.inventory']._release(
+            self.room_line_ids, date_from=fields.Date.today())
         self.write({"state": "check_out"})
-        for room in self.room_line_ids:
-            room.room_id.write({
-                'status': 'available',
-                'is_room_avail': True
-            })
-            room.write({'checkout_date': datetime.today()})
+        now = fields.Datetime.now()
+        # Lines whose stay has not started yet end at their check-in, the
+        # checkout cannot precede it
+        for checkout, lines in self.room_line_ids.grouped(
+                lambda line: max(now, line.checkin_date)).items():
+            lines.write({'checkout_date': checkout})
+        self.env['cleaning.request'].sudo()._create_checkout_requests(
+            self.room_line_ids)
 
     def action_invoice(self):
         """Method for creating invoice"""
-        if not self.room_line_ids:
-            raise ValidationError(_("Please Enter Room Details"))
-        booking_list = self._compute_amount_untaxed(True)
-        if booking_list:
-            account_move = self.env["account.move"].create([{
-                'move_type': 'out_invoice',
-                'invoice_date': fields.Date.today(),
-                'partner_id': self.partner_id.id,
-                'ref': self.name,
-            }])
-            for rec in booking_list:
-                account_move.invoice_line_ids.create([{
-                    'name': rec['name'],
-                    'quantity': rec['quantity'],
-                    'price_unit': rec['price_unit'],
-                    'move_id': account_move.id,
-                    'price_subtotal': rec['quantity'] * rec['price_unit'],
-                    'product_type': rec['product_type'],
-                }])
-            self.write({'invoice_status': "invoiced"})
-            self.invoice_button_visible = True
+        self._check_room_lines()
+        account_move = self._create_invoices()
+        if len(account_move) == 1:
             return {
                 'type': 'ir.actions.act_window',
                 'name': 'Invoices',
@@ -682,6 +792,72 @@ class RoomBooking(models.Model):
                 'res_id': account_move.id,
                 'context': "{'create': False}"
             }
+        if account_move:
+            return {
+                'type': 'ir.actions.act_window',
+                'name': 'Invoices',
+                'view_mode': 'list,form',
+                'res_model': 'account.move',
+                'domain': [('id', 'in', account_move.ids)],
+                'context': "{'create': False}"
+            }
+
+    def _create_invoices(self, post=False):
+        """Creates the invoices of the bookings. The moves of a batch of
+        bookings are created with their lines by a single create, so
+        that the move totals are computed once per batch.
+        :param post: post the invoices once they are all created
+        :return: account.move recordset"""
+        unassigned = self.room_line_ids.filtered(lambda line: not line.room_id)
+        if unassigned:
+            raise ValidationError(_(
+                "Please assign the rooms of %s before invoicing them.",
+                ", ".join(unassigned.booking_id.mapped('name'))))
+        moves = self.env['account.move']
+        for bookings in split_every(INVOICE_BATCH_SIZE, self.ids,
+                                    self.browse):
+            line_values = bookings._get_invoice_line_values()
+            bookings.room_line_ids.booking_line_visible = True
+            to_invoice = bookings.filtered(
+                lambda booking: line_values[booking.id])
+            if not to_invoice:
+                continue
+            moves |= self.env['account.move'].create([
+                booking._prepare_invoice_values(line_values[booking.id])
+                for booking in to_invoice])
+            to_invoice.write({'invoice_status': 'invoiced',
+                              'invoice_button_visible': True})
+        if post and moves:
+            moves.action_post()
+        return moves
+
+    def _prepare_invoice_values(self, line_values):
+        """Returns the values of the invoice of the booking
+        :param line_values: invoice line values of the booking, as
+            returned by _get_invoice_line_values"""
+        self.ensure_one()
+        return {
+            'move_type': 'out_invoice',
+            'invoice_date': fields.Date.today(),
+            'partner_id': self.partner_id.id,
+            'ref': self.name,
+            'hotel_booking_id': self.id,
+            'invoice_line_ids': [Command.create({
+                'name': line['name'],
+                'quantity': line['quantity'],
+                'price_unit': line['price_unit'],
+                'product_type': line['product_type'],
+                'hotel_line_ref': line['hotel_line_ref'],
+            }) for line in line_values],
+        }
+
+    @api.model
+    def _cron_create_invoices(self, post=True):
+        """Invoices the checked-out bookings that are not invoiced yet"""
+        self.search([
+            ('state', 'in', ['check_out', 'done']),
+            ('invoice_status', '!=', 'invoiced'),
+        ])._create_invoices(post=post)
 
     def action_view_invoices(self):
         """Method for Returning invoice View"""
@@ -691,7 +867,7 @@ class RoomBooking(models.Model):
             'view_mode': 'list,form',
             'view_type': 'list,form',
             'res_model': 'account.move',
-            'domain': [('ref', '=', self.name)],
+            'domain': [('hotel_booking_id', '=', self.id)],
             'context': "{'create': False}"
         }
 
@@ -699,111 +875,26 @@ class RoomBooking(models.Model):
         """
         @param self: object pointer
         """
-        if not self.room_line_ids:
-            raise ValidationError(_("Please Enter Room Details"))
-        else:
-            for room in self.room_line_ids:
-                room.room_id.write({
-                    'status': 'occupied',
-                })
-                room.room_id.is_room_avail = False
-            self.write({"state": "check_in"})
-            return {
-                'type': 'ir.actions.client',
-                'tag': 'display_notification',
-                'params': {
-                    'type': 'success',
-                    'message': "Booking Checked In Successfully!",
-                    'next': {'type': 'ir.actions.act_window_close'},
-                }
+        self._check_transition(['draft', 'reserved'])
+        self._check_room_lines()
+        unassigned = self.room_line_ids.filtered(lambda line: not line.room_id)
+        if unassigned:
+            raise ValidationError(_(
+                "Please assign the rooms of %s before the check-in.",
+                ", ".join(unassigned.booking_id.mapped('name'))))
+        self.env['hotel.room.type.inventory']._reserve(self.filtered(
+            lambda booking: booking.state == 'draft').room_line_ids)
+        self.write({"state": "check_in"})
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'type': 'success',
+                'message': "Booking Checked In Successfully!",
+                'next': {'type': 'ir.actions.act_window_close'},
             }
+        }
 
     def get_details(self):
         """ Returns different counts for displaying in dashboard"""
-        today = datetime.today()
-        tz_name = self.env.user.tz
-        today_utc = pytz.timezone('UTC').localize(today,
-                                                  is_dst=False)
-        context_today = today_utc.astimezone(pytz.timezone(tz_name))
-        total_room = self.env['hotel.room'].search_count([])
-        check_in = self.env['room.booking'].search_count(
-            [('state', '=', 'check_in')])
-        available_room = self.env['hotel.room'].search(
-            [('status', '=', 'available')])
-        reservation = self.env['room.booking'].search_count(
-            [('state', '=', 'reserved')])
-        check_outs = self.env['room.booking'].search([])
-        check_out = 0
-        staff = 0
-        for rec in check_outs:
-            for room in rec.room_line_ids:
-                if room.checkout_date.date() == context_today.date():
-                    check_out += 1
-            """staff"""
-            staff = self.env['res.users'].search_count(
-                [('groups_id', 'in',
-                  [self.env.ref('hotel_management_odoo.hotel_group_admin').id,
-                   self.env.ref(
-                       'hotel_management_odoo.cleaning_team_group_head').id,
-                   self.env.ref(
-                       'hotel_management_odoo.cleaning_team_group_user').id,
-                   self.env.ref(
-                       'hotel_management_odoo.hotel_group_reception').id,
-                   self.env.ref(
-                       'hotel_management_odoo.maintenance_team_group_leader').id,
-                   self.env.ref(
-                       'hotel_management_odoo.maintenance_team_group_user').id
-                   ])])
-        total_vehicle = self.env['fleet.vehicle.model'].search_count([])
-        available_vehicle = total_vehicle - self.env[
-            'fleet.booking.line'].search_count(
-            [('state', '=', 'check_in')])
-        total_event = self.env['event.event'].search_count([])
-        pending_event = self.env['event.event'].search([])
-        pending_events = 0
-        today_events = 0
-        for pending in pending_event:
-            if pending.date_end >= fields.datetime.now():
-                pending_events += 1
-            if pending.date_end.date() == fields.date.today():
-                today_events += 1
-        food_items = self.env['lunch.product'].search_count([])
-        food_order = len(self.env['food.booking.line'].search([]).filtered(
-            lambda r: r.booking_id.state not in ['check_out', 'cancel',
-                                                 'done']))
-        """total Revenue"""
-        total_revenue = 0
-        today_revenue = 0
-        pending_payment = 0
-        for rec in self.env['account.move'].search(
-                [('payment_state', '=', 'paid')]):
-            if rec.ref:
-                if 'BOOKING' in rec.ref:
-                    total_revenue += rec.amount_total
-                    if rec.date == fields.date.today():
-                        today_revenue += rec.amount_total
-        for rec in self.env['account.move'].search(
-                [('payment_state', '=', 'not_paid')]):
-            if rec.ref:
-                if 'BOOKING' in rec.ref:
-                    pending_payment += rec.amount_total
-        return {
-            'total_room': total_room,
-            'available_room': len(available_room),
-            'staff': staff,
-            'check_in': check_in,
-            'reservation': reservation,
-            'check_out': check_out,
-            'total_vehicle': total_vehicle,
-            'available_vehicle': available_vehicle,
-            'total_event': total_event,
-            'today_events': today_events,
-            'pending_events': pending_events,
-            'food_items': food_items,
-            'food_order': food_order,
-            'total_revenue': round(total_revenue, 2),
-            'today_revenue': round(today_revenue, 2),
-            'pending_payment': round(pending_payment, 2),
-            'currency_symbol': self.env.user.company_id.currency_id.symbol,
-            'currency_position': self.env.user.company_id.currency_id.position
-        }
\ No newline at end of file
+        return self.env['hotel.dashboard'].get_tiles()
@@ -19,15 +19,55 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 ###############################################################################
+from bisect import bisect_left, insort
+from collections import defaultdict
 from odoo import api, fields, models, tools, _
 from odoo.exceptions import ValidationError
+from .hotel_rate_plan import stay_nights
+
+# Booking states in which a room line blocks its room for other guests.
+OCCUPYING_STATES = ('reserved', 'check_in')
+
+
+def _fit_score(stays, checkin, checkout, booking_id, horizon_start,
+               horizon_end):
+    """Scores a stay on a room given the stays already on the room, sorted
+    by check-in and not overlapping each other, lower being better: stays
+    continuing a stay of the same booking first (no room move), then the
+    smallest idle time left around the stay. Returns None when the room is
+    not free."""
+    index = bisect_left(stays, (checkin,))
+    previous = stays[index - 1] if index else None
+    following = stays[index] if index < len(stays) else None
+    if previous and previous[1] > checkin \
+            or following and following[0] < checkout:
+        return None
+    idle_before = checkin - (previous[1] if previous else horizon_start)
+    idle_after = (following[0] if following else horizon_end) - checkout
+    moves = 0 if previous and previous[1] == checkin \
+        and previous[2] == booking_id else 1
+    return moves, (idle_before + idle_after).total_seconds()
 
 
 class RoomBookingLine(models.Model):
     """Model that handles the room booking form"""
     _name = "room.booking.line"
     _description = "Hotel Folio Line"
+    _inherit = "hotel.booking.line.mixin"
     _rec_name = 'room_id'
+    _sql_constraints = [
+        ('check_dates_order', 'CHECK (checkout_date >= checkin_date)',
+         'Checkout must be greater or equal checkin date'),
+        ('check_room_or_type',
+         'CHECK (room_id IS NOT NULL OR room_type_id IS NOT NULL)',
+         'Please select a room or a room type.'),
+        ('room_interval_no_overlap',
+         "EXCLUDE USING gist (room_id WITH =, "
+         "tsrange(checkin_date, checkout_date, '[)') WITH &&) "
+         "WHERE (state IN ('reserved', 'check_in'))",
+         'Sorry, You cannot create a reservation for this date since it '
+         'overlaps with another reservation..!!'),
+    ]
 
     @tools.ormcache()
     def _set_default_uom_id(self):
@@ -39,26 +79,42 @@ class RoomBookingLine(models.Model):
     checkin_date = fields.Datetime(string="Check In",
                                    help="You can choose the date,"
                                         " Otherwise sets to current Date",
-                                   required=True)
+                                   required=True, index=True)
     checkout_date = fields.Datetime(string="Check Out",
                                     help="You can choose the date,"
                                          " Otherwise sets to current Date",
-                                    required=True)
+                                    required=True, index=True)
     room_id = fields.Many2one('hotel.room', string="Room",
-                              help="Indicates the Room",
-                              required=True,
-                              domain="[('status', '=', 'available')]")
+                              help="Indicates the Room, it can be assigned "
+                                   "later for the lines booking a room type",
+                              index=True,
+                              domain="[('id', 'in', available_room_ids)]")
+    room_type_id = fields.Many2one('hotel.room.type', string="Room Type",
+                                   compute='_compute_room_type_id',
+                                   store=True, readonly=False, index=True,
+                                   help="Type of the room booked")
+    num_person = fields.Integer(string="Guests", default=1,
+                                help="Number of guests staying in the room")
+    floor_id = fields.Many2one('hotel.floor', string="Preferred Floor",
+                               help="Floor the room is assigned on")
+    available_room_ids = fields.Many2many(
+        'hotel.room', string="Available Rooms",
+        compute='_compute_available_room_ids',
+        help="Rooms that are free for the selected stay")
     uom_qty = fields.Float(string="Duration",
-                           help="The quantity converted into the UoM used by "
-                                "the product", readonly=True)
+                           help="Number of nights of the stay",
+                           compute='_compute_uom_qty', store=True)
     uom_id = fields.Many2one('uom.uom',
                              default=_set_default_uom_id,
                              string="Unit of Measure",
                              help="This will set the unit of measure used",
                              readonly=True)
-    price_unit = fields.Float(related='room_id.list_price', string='Rent',
-                              digits='Product Price',
-                              help="The rent price of the selected room.")
+    price_unit = fields.Float(string='Rent', digits='Product Price',
+                              compute='_compute_price_unit', store=True,
+                              readonly=False,
+                              help="Average nightly rent of the stay, from "
+                                   "the rate plan of the booking or the rent "
+                                   "of the room.")
     tax_ids = fields.Many2many('account.tax',
                                'hotel_room_order_line_taxes_rel',
                                'room_id', 'tax_id',
@@ -84,88 +140,244 @@ class RoomBookingLine(models.Model):
     state = fields.Selection(related='booking_id.state',
                              string="Order Status",
                              help=" Status of the Order",
+                             store=True, index=True,
                              copy=False)
     booking_line_visible = fields.Boolean(default=False,
                                           string="Booking Line Visible",
                                           help="If True, then Booking Line "
                                                "will be visible")
 
+    def _auto_init(self):
+        """The overlap exclusion constraint compares room ids with a GiST
+        index, which needs the btree_gist extension."""
+        self.env.cr.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+        return super()._auto_init()
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Adds the nights of the new lines to the occupancy grid, and to
+        the room type inventory for lines of reserved bookings"""
+        lines = super().create(vals_list)
+        self.env['hotel.room.occupancy']._refresh_lines(lines)
+        self.env['hotel.room.type.inventory']._reserve(lines.filtered(
+            lambda line: line.state in OCCUPYING_STATES))
+        return lines
+
+    def write(self, vals):
+        """Keeps the occupancy grid and the room type inventory in line
+        with the room and the dates"""
+        stay_changed = {'room_id', 'room_type_id', 'checkin_date',
+                        'checkout_date'}.intersection(vals)
+        occupying = self.filtered(
+            lambda line: line.state in OCCUPYING_STATES) \
+            if stay_changed else self.browse()
+        inventory = self.env['hotel.room.type.inventory']
+        inventory._release(occupying)
+        res = super().write(vals)
+        inventory._reserve(occupying)
+        if {'room_id', 'checkin_date', 'checkout_date',
+                'booking_id'}.intersection(vals):
+            self.env['hotel.room.occupancy']._refresh_lines(self)
+        return res
+
+    def unlink(self):
+        """Flags the KPI snapshots of the nights that are freed and gives
+        the rooms of reserved lines back to the inventory"""
+        self.env['hotel.kpi.snapshot']._mark_stale(
+            self.env['hotel.room.occupancy']._clear_lines(self))
+        self.env['hotel.room.type.inventory']._release(self.filtered(
+            lambda line: line.state in OCCUPYING_STATES))
+        return super().unlink()
+
     @api.onchange("checkin_date", "checkout_date")
     def _onchange_checkin_date(self):
         """When you change checkin_date or checkout_date it will check
-        and update the qty of hotel service line
+        the order of the dates
         -----------------------------------------------------------------
         @param self: object pointer"""
-        if self.checkout_date < self.checkin_date:
+        if self.checkin_date and self.checkout_date \
+                and self.checkout_date < self.checkin_date:
             raise ValidationError(
                 _("Checkout must be greater or equal checkin date"))
-        if self.checkin_date and self.checkout_date:
-            diffdate = self.checkout_date - self.checkin_date
-            qty = diffdate.days
-            if diffdate.total_seconds() > 0:
-                qty = qty + 1
-            self.uom_qty = qty
-
-    @api.depends('uom_qty', 'price_unit', 'tax_ids')
-    def _compute_price_subtotal(self):
-        """Compute the amounts of the room booking line."""
+
+    @api.depends('checkin_date', 'checkout_date')
+    def _compute_uom_qty(self):
+        """Number of nights of the stay, counted as in the occupancy grid,
+        so that lines created without the form are priced as well"""
+        for line in self:
+            if line.checkin_date and line.checkout_date \
+                    and line.checkout_date >= line.checkin_date:
+                line.uom_qty = stay_nights(line.checkin_date,
+                                           line.checkout_date)
+            else:
+                line.uom_qty = 0
+
+    @api.depends('room_id')
+    def _compute_room_type_id(self):
+        """The room type follows the room once it is assigned"""
+        for line in self:
+            line.room_type_id = line.room_id.room_type or line.room_type_id
+
+    @api.depends('checkin_date', 'checkout_date', 'room_type_id',
+                 'num_person', 'floor_id')
+    def _compute_available_room_ids(self):
+        """Rooms that can be selected for the stay of the line"""
         for line in self:
-            base_line = line._prepare_base_line_for_taxes_computation()
-            self.env['account.tax']._add_tax_details_in_base_line(base_line, self.env.company)
-            line.price_subtotal = base_line['tax_details']['raw_total_excluded_currency']
-            print("total_excluded_currency",line.price_subtotal)
-            line.price_total = base_line['tax_details']['raw_total_included_currency']
-            print("total_included_currency",line.price_total)
-            line.price_tax = line.price_total - line.price_subtotal
-            if self.env.context.get('import_file',
-                                    False) and not self.env.user. \
-                    user_has_groups('account.group_account_manager'):
-                line.tax_id.invalidate_recordset(
-                    ['invoice_repartition_line_ids'])
-
-    def _prepare_base_line_for_taxes_computation(self):
-        """ Convert the current record to a dictionary in order to use the generic taxes computation method
-        defined on account.tax.
-
-        :return: A python dictionary.
-        """
-        self.ensure_one()
-        return self.env['account.tax']._prepare_base_line_for_taxes_computation(
-            self,
-            **{
-                'tax_ids': self.tax_ids,
-                'quantity': self.uom_qty,
-                'partner_id': self.booking_id.partner_id,
-                'currency_id': self.currency_id,
-            },
-        )
+            line.available_room_ids = self.env['hotel.room'].search_available(
+                line.checkin_date, line.checkout_date,
+                num_person=line.num_person,
+                room_type_ids=line.room_type_id.ids or None,
+                floor_ids=line.floor_id.ids or None,
+                exclude_line_ids=line._origin.ids)
+
+    @api.depends('room_id', 'room_type_id', 'checkin_date', 'checkout_date',
+                 'booking_id.rate_plan_id')
+    def _compute_price_unit(self):
+        """Prices the stays of the lines from the nightly prices of the
+        rate plan of their booking, one query per rate plan. Stays that
+        the plan does not price take the rent of the room. The price of
+        the lines is frozen once their booking leaves draft, so that the
+        checkout or a change of dates does not reprice a confirmed
+        stay."""
+        to_price = self.filtered(lambda line: not line._origin
+                                 or line.state in (False, 'draft'))
+        for plan, lines in to_price.grouped(
+                lambda line: line.booking_id.rate_plan_id).items():
+            stays = [
+                (index, line.room_type_id.id, line.checkin_date.date(),
+                 stay_nights(line.checkin_date, line.checkout_date))
+                for index, line in enumerate(lines)
+                if line.room_type_id and line.checkin_date
+                and line.checkout_date
+                and line.checkout_date >= line.checkin_date
+            ] if plan else []
+            prices = plan._get_stay_prices(stays) if stays else {}
+            nights = {stay[0]: stay[3] for stay in stays}
+            for index, line in enumerate(lines):
+                if index in prices:
+                    line.price_unit = prices[index] / nights[index]
+                else:
+                    line.price_unit = line.room_id.list_price
+
+    def _get_overlapping_lines(self):
+        """Returns the reserved or checked-in lines of other guests whose
+        stay overlaps the stay of the lines in self on the same room.
+        All lines are checked with a single query on the GiST index of the
+        room_interval_no_overlap constraint."""
+        values = [(line.room_id.id, line.checkin_date, line.checkout_date,
+                   line._origin.id or 0)
+                  for line in self
+                  if line.room_id and line.checkin_date and line.checkout_date
+                  and line.checkout_date >= line.checkin_date]
+        if not values:
+            return self.browse()
+        self.flush_model(['room_id', 'checkin_date', 'checkout_date',
+                          'state'])
+        self.env.cr.execute("""
+            SELECT DISTINCT booked.id
+              FROM room_booking_line booked
+              JOIN (VALUES %s) AS line(room_id, checkin, checkout, line_id)
+                ON booked.room_id = line.room_id
+             WHERE booked.state IN %%s
+               AND booked.id != line.line_id
+               AND tsrange(booked.checkin_date, booked.checkout_date, '[)')
+                   && tsrange(line.checkin, line.checkout, '[)')
+        """ % ", ".join(["(%s, %s::timestamp, %s::timestamp, %s)"] *
+                        len(values)),
+            [param for row in values for param in row] +
+            [OCCUPYING_STATES])
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    def _assign_rooms(self):
+        """Assigns rooms to the lines booking a room type. The stays are
+        packed on the rooms of their type by a greedy interval scheduling:
+        the earliest and longest stays first, each on the free room that
+        continues the stay of the same booking or leaves the least idle
+        time around it, among the rooms large enough, on the preferred
+        floor and not under maintenance. The stays of the rooms are read
+        with one query and kept sorted and merged when they overlap, so
+        that each room is checked by bisection.
+        :return: lines left without room"""
+        lines = self.filtered(
+            lambda line: not line.room_id and line.room_type_id
+            and line.checkin_date and line.checkout_date)
+        if not lines:
+            return lines
+        horizon_start = min(lines.mapped('checkin_date'))
+        horizon_end = max(lines.mapped('checkout_date'))
+        rooms = self.env['hotel.room'].search([
+            ('room_type', 'in', lines.room_type_id.ids),
+            ('is_unavailable_for_maintenance', '=', False),
+        ])
+        self.flush_model(['room_id', 'checkin_date', 'checkout_date',
+                          'state', 'booking_id'])
+        self.env.cr.execute("""
+            SELECT room_id, checkin_date, checkout_date, booking_id
+              FROM room_booking_line
+             WHERE room_id = ANY(%s)
+               AND state IN %s
+               AND checkin_date < %s
+               AND checkout_date > %s
+             ORDER BY checkin_date
+        """, [rooms.ids, ('draft',) + OCCUPYING_STATES, horizon_end,
+              horizon_start])
+        stays = defaultdict(list)
+        for room_id, checkin, checkout, booking_id in \
+                self.env.cr.fetchall():
+            room_stays = stays[room_id]
+            if room_stays and room_stays[-1][1] > checkin:
+                # Draft stays may overlap each other: they are merged, a
+                # new stay only has to fit around the merged stay, which
+                # ends with the booking of its last checkout.
+                if checkout > room_stays[-1][1]:
+                    room_stays[-1] = (room_stays[-1][0], checkout,
+                                      booking_id or 0)
+            else:
+                room_stays.append((checkin, checkout, booking_id or 0))
+        rooms_by_type = rooms.grouped('room_type')
+        assignment = defaultdict(list)
+        for line in lines.sorted(lambda line: (
+                line.checkin_date, line.checkin_date - line.checkout_date)):
+            best = None
+            for room in rooms_by_type.get(line.room_type_id, []):
+                if room.num_person < line.num_person or (
+                        line.floor_id and room.floor_id != line.floor_id):
+                    continue
+                score = _fit_score(stays[room.id], line.checkin_date,
+                                   line.checkout_date, line.booking_id.id or 0,
+                                   horizon_start, horizon_end)
+                if score is not None and (best is None or score < best[0]):
+                    best = (score, room)
+            if best:
+                insort(stays[best[1].id], (line.checkin_date,
+                                           line.checkout_date,
+                                           line.booking_id.id or 0))
+                assignment[best[1]].append(line.id)
+        for room, line_ids in assignment.items():
+            self.browse(line_ids).write({'room_id': room.id})
+        return lines.filtered(lambda line: not line.room_id)
+
+    @api.constrains('room_id', 'checkin_date', 'checkout_date')
+    def _check_room_availability(self):
+        """Server side counterpart of onchange_checkin_date, so that
+        reservations created by RPC or imports are validated as well."""
+        active_lines = self.filtered(
+            lambda line: line.state in ('draft',) + OCCUPYING_STATES)
+        if active_lines._get_overlapping_lines():
+            raise ValidationError(
+                _("Sorry, You cannot create a reservation for "
+                  "this date since it overlaps with another "
+                  "reservation..!!"))
 
     @api.onchange('checkin_date', 'checkout_date', 'room_id')
     def onchange_checkin_date(self):
         """On change of check-in date, check-out date, or room ID,
            this method validates if the selected room is available
-           for the given dates. It searches for existing bookings
-           in the 'reserved' or 'check_in' state and checks for date
-           conflicts. If a conflict is found, a ValidationError is raised."""
-        records = self.env['room.booking'].search(
-            [('state', 'in', ['reserved', 'check_in'])])
-        for rec in records:
-            rec_room_id = rec.room_line_ids.room_id
-            rec_checkin_date = rec.room_line_ids.checkin_date
-            rec_checkout_date = rec.room_line_ids.checkout_date
-            if rec_room_id and rec_checkin_date and rec_checkout_date:
-                # Check for conflicts with existing room lines
-                for line in self:
-                    if line.id != rec.id and line.room_id == rec_room_id:
-                        # Check if the dates overlap
-                        if (rec_checkin_date <= line.checkin_date <= rec_checkout_date or
-                                rec_checkin_date <= line.checkout_date <= rec_checkout_date):
-                            raise ValidationError(
-                                _("Sorry, You cannot create a reservation for "
-                                  "this date since it overlaps with another "
-                                  "reservation..!!"))
-                        if rec_checkout_date <= line.checkout_date and rec_checkin_date >= line.checkin_date:
-                            raise ValidationError(
-                                "Sorry You cannot create a reservation for this"
-                                "date due to an existing reservation between "
-                                "this date")
+           for the given dates. Existing lines in the 'reserved' or
+           'check_in' state are looked up with one indexed overlap query
+           and a ValidationError is raised on conflict."""
+        if self._get_overlapping_lines():
+            raise ValidationError(
+                _("Sorry, You cannot create a reservation for "
+                  "this date since it overlaps with another "
+                  "reservation..!!"))
@@ -1,8 +1,9 @@
 /** @odoo-module */
 import { registry} from '@web/core/registry';
 import { useService } from "@web/core/utils/hooks";
-const { Component, onWillStart, onMounted} = owl
+const { Component, onWillStart, onMounted, onWillUnmount, useRef} = owl
 import { rpc } from "@web/core/network/rpc";
+import { loadBundle } from "@web/core/assets";
 import { Domain } from "@web/core/domain";
 import { _t } from "@web/core/l10n/translation";
 import {serializeDate,serializeDateTime,} from "@web/core/l10n/dates";
@@ -19,17 +20,50 @@ export class CustomDashBoard extends Component {
 setup() {
     this.action = useService("action");
     this.orm = useService("orm");
+    this.occupancyChart = useRef("occupancy_chart");
+    this.revenueChart = useRef("revenue_chart");
+    this.activityChart = useRef("activity_chart");
+    this.charts = [];
     onWillStart(this.onWillStart);
     onMounted(this.onMounted);
+    onWillUnmount(() => this.charts.forEach((chart) => chart.destroy()));
 }
 async onWillStart() {
-    await this.fetch_data();
+    await Promise.all([this.fetch_data(), this.fetch_trend(),
+                       loadBundle("web.chartjs_lib")]);
 }
 async onMounted() {
-// Render other components after fetching data
-// this.render_project_task();
-// this.render_top_employees_graph();
-// this.render_filter();
+    this.render_trend_charts();
+}
+/**
+ * Daily KPIs of the last 30 days, read from the snapshot table filled by
+ * the nightly scheduled action.
+ */
+async fetch_trend() {
+    this.trend = await this.orm.call('hotel.kpi.snapshot', 'get_trend', [30], {});
+}
+render_trend_charts() {
+    const labels = this.trend.labels;
+    const chart = (ref, type, datasets) => {
+        if (ref.el) {
+            this.charts.push(new Chart(ref.el, {
+                type: type,
+                data: { labels: labels, datasets: datasets },
+                options: { maintainAspectRatio: false },
+            }));
+        }
+    };
+    chart(this.occupancyChart, 'line', [
+        { label: _t("Occupancy (%)"), data: this.trend.occupancy, borderColor: '#3858d9' },
+    ]);
+    chart(this.revenueChart, 'line', [
+        { label: _t("ADR"), data: this.trend.adr, borderColor: '#87c773' },
+        { label: _t("RevPAR"), data: this.trend.revpar, borderColor: '#e07407' },
+    ]);
+    chart(this.activityChart, 'bar', [
+        { label: _t("Food Orders"), data: this.trend.food_orders, backgroundColor: '#e39db5' },
+        { label: _t("Pending Payment"), data: this.trend.pending_payment, backgroundColor: '#f0b686' },
+    ]);
 }
 async fetch_data() {
        var self = this;
@@ -130,7 +164,8 @@ async fetch_data() {
             view_mode:'kanban,list,form',
             view_type:'form',
             views:[[false,'kanban'],[false,'list'],[false,'form']],
-            domain:  [['date_end', '=', formattedDate]],
+            domain:  [['date_end', '>=', serializeDateTime(luxon.DateTime.local().startOf('day'))],
+                      ['date_end', '<', serializeDateTime(luxon.DateTime.local().startOf('day').plus({ days: 1 }))]],
             target:'current'
         },options)
     }
@@ -147,7 +182,7 @@ async fetch_data() {
             view_mode:'kanban,list,form',
             view_type:'form',
             views:[[false,'kanban'],[false,'list'],[false,'form']],
-            domain:  [['date_end', '>=', formattedDate]],
+            domain:  [['date_end', '>=', serializeDateTime(luxon.DateTime.local())]],
             target:'current'
         },options)
     }
@@ -287,7 +322,7 @@ async fetch_data() {
             view_mode:'list,form',
             view_type:'form',
             views:[[false,'list'],[false,'form']],
-            domain: [['id','not in', result]],
+            domain: [['id','in', result]],
             target:'current'
         },options)
     }
@@ -0,0 +1,60 @@
+/** @odoo-module */
+import { registry } from '@web/core/registry';
+import { useService } from "@web/core/utils/hooks";
+import { _t } from "@web/core/l10n/translation";
+const { Component, onWillStart, onWillUnmount, useState } = owl
+
+const NOTIFICATION = "hotel_management_odoo.kitchen_orders";
+/**
+ * Kitchen display: loads the open food orders once, then applies the
+ * orders pushed over the bus whenever an order is created or changed.
+ */
+export class KitchenDisplay extends Component {
+    setup() {
+        this.orm = useService("orm");
+        this.busService = useService("bus_service");
+        this.state = useState({ orders: [] });
+        this.columns = [
+            { state: 'new', label: _t("New"), action: 'action_prepare',
+              button: _t("Start") },
+            { state: 'preparing', label: _t("Preparing"),
+              action: 'action_ready', button: _t("Ready") },
+            { state: 'ready', label: _t("Ready"), action: 'action_serve',
+              button: _t("Served") },
+        ];
+        this.onNotification = (payload) => this.applyOrders(payload.orders);
+        this.onReconnect = () => this.loadOrders();
+        onWillStart(() => this.loadOrders());
+        this.busService.subscribe(NOTIFICATION, this.onNotification);
+        this.busService.addEventListener("reconnect", this.onReconnect);
+        this.busService.start();
+        onWillUnmount(() => {
+            this.busService.unsubscribe(NOTIFICATION, this.onNotification);
+            this.busService.removeEventListener("reconnect", this.onReconnect);
+        });
+    }
+    async loadOrders() {
+        this.state.orders = await this.orm.call(
+            'food.booking.line', 'get_kitchen_orders', [], {});
+    }
+    /**
+     * Replaces the pushed orders, adds the new ones and drops the ones
+     * that are not open anymore.
+     */
+    applyOrders(orders) {
+        const pushed = new Map(orders.map((order) => [order.id, order]));
+        const kept = this.state.orders
+            .filter((order) => !pushed.has(order.id))
+            .concat(orders.filter((order) => order.is_open));
+        kept.sort((a, b) => a.create_date.localeCompare(b.create_date) || a.id - b.id);
+        this.state.orders = kept;
+    }
+    ordersOf(state) {
+        return this.state.orders.filter((order) => order.fulfilment_state === state);
+    }
+    async moveOrder(order, action) {
+        await this.orm.call('food.booking.line', action, [[order.id]]);
+    }
+}
+KitchenDisplay.template = "KitchenDisplay"
+registry.category("actions").add("hotel_kitchen_display", KitchenDisplay)
@@ -21,3 +21,4 @@
 ###############################################################################
 from .import room_booking_detail
 from .import sale_order_detail
+from .import room_assignment
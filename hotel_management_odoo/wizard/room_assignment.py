@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: ADARSH K (odoo@cybrosys.com)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from datetime import timedelta
+from odoo import api, fields, models, _
+from odoo.exceptions import ValidationError
+
+# Default number of days of arrivals the assignment runs over
+ASSIGNMENT_HORIZON_DAYS = 30
+
+
+class RoomAssignment(models.TransientModel):
+    """Assigns rooms to the room lines booking a room type"""
+    _name = "room.assignment"
+    _description = "Room Assignment"
+
+    date_from = fields.Date(string="From", required=True,
+                            default=fields.Date.context_today,
+                            help="First arrival day of the lines to assign")
+    date_to = fields.Date(string="To", required=True,
+                          default=lambda self: fields.Date.context_today(
+                              self) + timedelta(days=ASSIGNMENT_HORIZON_DAYS),
+                          help="Last arrival day of the lines to assign")
+    room_type_ids = fields.Many2many('hotel.room.type', string="Room Types",
+                                     help="Leave empty for all the room "
+                                          "types")
+    booking_ids = fields.Many2many('room.booking', string="Bookings",
+                                   help="Leave empty for all the bookings")
+
+    @api.model
+    def default_get(self, fields_list):
+        """Assigns the selected bookings when opened from the list"""
+        res = super().default_get(fields_list)
+        if self.env.context.get('active_model') == 'room.booking' \
+                and 'booking_ids' in fields_list:
+            res['booking_ids'] = [
+                fields.Command.set(self.env.context.get('active_ids', []))]
+        return res
+
+    def action_assign(self):
+        """Button action assigning the rooms"""
+        if self.date_from > self.date_to:
+            raise ValidationError(_(
+                'Check-in date should be less than Check-out date'))
+        domain = [
+            ('room_id', '=', False),
+            ('state', 'in', ['draft', 'reserved']),
+            ('checkin_date', '>=', self.date_from),
+            ('checkin_date', '<', self.date_to + timedelta(days=1)),
+        ]
+        if self.room_type_ids:
+            domain.append(('room_type_id', 'in', self.room_type_ids.ids))
+        if self.booking_ids:
+            domain.append(('booking_id', 'in', self.booking_ids.ids))
+        lines = self.env['room.booking.line'].search(domain)
+        unassigned = lines._assign_rooms()
+        if unassigned:
+            message = _("%(assigned)s room lines assigned, no room is free "
+                        "for %(unassigned)s of them.",
+                        assigned=len(lines - unassigned),
+                        unassigned=len(unassigned))
+        else:
+            message = _("%s room lines assigned.", len(lines))
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'type': 'warning' if unassigned else 'success',
+                'message': message,
+                'next': {'type': 'ir.actions.act_window_close'},
+            }
+        }
@@ -20,7 +20,7 @@
 #
 ###############################################################################
 import io
-import json
+from datetime import timedelta
 from odoo import fields, models, _
 from odoo.exceptions import ValidationError
 from odoo.tools import json_default
@@ -31,6 +31,10 @@ except ImportError:
     import xlsxwriter
 
 
+# Number of room lines read per query when generating the report
+REPORT_PAGE_SIZE = 5000
+
+
 class RoomBookingWizard(models.TransientModel):
     """Pdf Report for room Booking"""
 
@@ -41,9 +45,15 @@ class RoomBookingWizard(models.TransientModel):
     checkout = fields.Date(help="Choose the Checkout Date", string="Checkout")
     room_id = fields.Many2one("hotel.room", string="Room",
                               help="Choose The Room")
+    run_in_background = fields.Boolean(
+        string="Generate in Background",
+        help="Render the report in the background and notify when it is "
+             "ready, for large periods")
 
     def action_room_booking_pdf(self):
         """Button action_room_booking_pdf function"""
+        if self.run_in_background:
+            return self.env['hotel.report.job']._enqueue(self, 'pdf')
         data = {
             "booking": self.generate_data(),
         }
@@ -53,65 +63,104 @@ class RoomBookingWizard(models.TransientModel):
 
     def action_room_booking_excel(self):
         """Button action for creating Room Booking Excel report"""
-        data = {
-            "booking": self.generate_data(),
-        }
+        if self.run_in_background:
+            return self.env['hotel.report.job']._enqueue(self, 'xlsx')
         return {
             "type": "ir.actions.report",
             "data": {
                 "model": "room.booking.detail",
-                "options": json.dumps(data, default=json_default),
+                "wizard_id": self.id,
                 "output_format": "xlsx",
                 "report_name": "Excel Report",
             },
             "report_type": "xlsx",
         }
 
+    def _get_report_job_values(self):
+        """Values of the background job rendering the report"""
+        return {'checkin': self.checkin, 'checkout': self.checkout,
+                'room_id': self.room_id.id}
+
     def generate_data(self):
         """Generate data to be printed in the report"""
-        domain = []
-        room_list = []
+        return list(self._iter_report_rows())
+
+    def _iter_report_rows(self, page_size=REPORT_PAGE_SIZE):
+        """Yields the report rows page by page, so that callers writing
+        the rows out never hold more than one page in memory"""
+        after_id = 0
+        while True:
+            rows = self._read_report_page(after_id, page_size)
+            yield from rows
+            if len(rows) < page_size:
+                return
+            after_id = rows[-1]["line_id"]
+
+    def _read_report_page(self, after_id=0, limit=REPORT_PAGE_SIZE):
+        """Returns one page of report rows, one per booked room. The room
+        lines are read joined to their booking, guest and room in a single
+        query, paginated on the line id (keyset) and filtered in SQL.
+        :param after_id: id of the last room line of the previous page
+        :param limit: maximum number of rows of the page
+        :return: list of dictionaries"""
         if self.checkin and self.checkout:
             if self.checkin > self.checkout:
                 raise ValidationError(
                     _("Check-in date should be less than Check-out date")
                 )
+        self.env["room.booking.line"].check_access("read")
+        self.env["room.booking"].check_access("read")
+        self.env.flush_all()
+        conditions = ["line.id > %(after_id)s"]
         if self.checkin:
-            domain.append(
-                ("checkin_date", ">=", self.checkin),
-            )
+            conditions.append("booking.checkin_date >= %(checkin)s")
         if self.checkout:
-            domain.append(
-                ("checkout_date", "<=", self.checkout),
-            )
-        room_booking = self.env["room.booking"].search_read(
-            domain=domain,
-            fields=["partner_id", "name", "checkin_date", "checkout_date"],
-        )
-        for rec in room_booking:
-            rooms = (
-                self.env["room.booking"]
-                .browse(rec["id"])
-                .room_line_ids.room_id.mapped("name")
-            )
-            rec["partner_id"] = rec["partner_id"][1]
-            for room in rooms:
-                if self.room_id:
-                    if self.room_id.name == room:
-                        rec_copy = rec.copy()
-                        rec_copy["room"] = room  # Ensure this key is added
-                        room_list.append(rec_copy)
-                else:
-                    rec_copy = rec.copy()
-                    rec_copy["room"] = room  # Ensure this key is added
-                    room_list.append(rec_copy)
-
-        return room_list
+            # The checkout column is a datetime: keep every checkout of the
+            # chosen day by comparing with the start of the next one.
+            conditions.append("booking.checkout_date < %(checkout)s")
+        if self.room_id:
+            conditions.append("line.room_id = %(room_id)s")
+        self.env.cr.execute("""
+            SELECT line.id AS line_id, booking.id, booking.name,
+                   partner.name AS partner_id,
+                   booking.checkin_date, booking.checkout_date,
+                   COALESCE(room.name->>%%(lang)s, room.name->>'en_US')
+                       AS room
+              FROM room_booking_line line
+              JOIN room_booking booking ON booking.id = line.booking_id
+              JOIN res_partner partner ON partner.id = booking.partner_id
+              JOIN hotel_room room ON room.id = line.room_id
+             WHERE %s
+             ORDER BY line.id
+             LIMIT %%(limit)s
+        """ % " AND ".join(conditions), {
+            "after_id": after_id,
+            "checkin": self.checkin,
+            "checkout": self.checkout and self.checkout + timedelta(days=1),
+            "room_id": self.room_id.id,
+            "lang": self.env.lang or "en_US",
+            "limit": limit,
+        })
+        return self.env.cr.dictfetchall()
 
     def get_xlsx_report(self, data, response):
         """Organizing xlsx report"""
         output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output, {"in_memory": True})
+        self._write_xlsx_report(output, data["booking"],
+                                {"in_memory": True})
+        output.seek(0)
+        response.stream.write(output.read())
+        output.close()
+
+    def _write_xlsx_report(self, output, rows=None, options=None):
+        """Writes the report into the output file. Without rows, the data
+        is queried again from the wizard and the workbook is written row
+        by row in constant memory mode, so that large reports are not
+        kept in memory."""
+        if rows is None:
+            rows = self._iter_report_rows()
+        workbook = xlsxwriter.Workbook(
+            output, options or {"constant_memory": True})
         sheet = workbook.add_worksheet()
         cell_format = workbook.add_format(
             {"font_size": "14px", "bold": True, "align": "center",
@@ -136,16 +185,15 @@ class RoomBookingWizard(models.TransientModel):
         row = 2
         column = 0
         value = 1
-        for i in data["booking"]:
+        for i in rows:
             sheet.write(row, column, value, body)
             sheet.write(row, column + 1, i["partner_id"], body)
             sheet.write(row, column + 2, i["room"], body)
-            sheet.write(row, column + 3, i["checkin_date"], body)
-            sheet.write(row, column + 4, i["checkout_date"], body)
+            sheet.write(row, column + 3,
+                        json_default(i["checkin_date"]), body)
+            sheet.write(row, column + 4,
+                        json_default(i["checkout_date"]), body)
             sheet.write(row, column + 5, i["name"], body)
             row = row + 1
             value = value + 1
         workbook.close()
-        output.seek(0)
-        response.stream.write(output.read())
-        output.close()
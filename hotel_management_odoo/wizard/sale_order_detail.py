@@ -20,7 +20,6 @@
 #
 ###############################################################################
 import io
-import json
 from odoo import fields, models, _
 from odoo.exceptions import ValidationError
 from odoo.tools import json_default
@@ -38,9 +37,15 @@ class SaleOrderWizard(models.TransientModel):
 
     checkin = fields.Date(help="Choose the Checkin Date", string="Check In")
     checkout = fields.Date(help="Choose the Checkout Date", string="Check Out")
+    run_in_background = fields.Boolean(
+        string="Generate in Background",
+        help="Render the report in the background and notify when it is "
+             "ready, for large periods")
 
     def action_sale_order_pdf(self):
         """Button action for creating Sale Order Pdf Report"""
+        if self.run_in_background:
+            return self.env['hotel.report.job']._enqueue(self, 'pdf')
         data = {
             'booking': self.generate_data(),
         }
@@ -50,20 +55,22 @@ class SaleOrderWizard(models.TransientModel):
 
     def action_sale_order_excel(self):
         """Button action for creating Sale Order Report"""
-        data = {
-            'booking': self.generate_data(),
-        }
+        if self.run_in_background:
+            return self.env['hotel.report.job']._enqueue(self, 'xlsx')
         return {
             'type': 'ir.actions.report',
             'data': {'model': 'sale.order.detail',
-                     'options': json.dumps(data,
-                                           default=json_default),
+                     'wizard_id': self.id,
                      'output_format': 'xlsx',
                      'report_name': 'Excel Report',
                      },
             'report_type': 'xlsx',
         }
 
+    def _get_report_job_values(self):
+        """Values of the background job rendering the report"""
+        return {'checkin': self.checkin, 'checkout': self.checkout}
+
     def generate_data(self):
         """Generate data to be printed in the report"""
         domain = []
@@ -89,7 +96,20 @@ class SaleOrderWizard(models.TransientModel):
     def get_xlsx_report(self, data, response):
         """Organizing xlsx report"""
         output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+        self._write_xlsx_report(output, data['booking'], {'in_memory': True})
+        output.seek(0)
+        response.stream.write(output.read())
+        output.close()
+
+    def _write_xlsx_report(self, output, rows=None, options=None):
+        """Writes the report into the output file. Without rows, the data
+        is queried again from the wizard and the workbook is written row
+        by row in constant memory mode, so that large reports are not
+        kept in memory."""
+        if rows is None:
+            rows = self.generate_data()
+        workbook = xlsxwriter.Workbook(
+            output, options or {'constant_memory': True})
         sheet = workbook.add_worksheet()
         cell_format = workbook.add_format(
             {'font_size': '14px', 'bold': True, 'align': 'center',
@@ -112,17 +132,16 @@ class SaleOrderWizard(models.TransientModel):
         row = 2
         column = 0
         value = 1
-        for i in data['booking']:
+        for i in rows:
             sheet.write(row, column, value, body)
             sheet.write(row, column + 1, i['partner_id'], body)
-            sheet.write(row, column + 2, i['checkin_date'], body)
-            sheet.write(row, column + 3, i['checkout_date'], body)
+            sheet.write(row, column + 2,
+                        json_default(i['checkin_date']), body)
+            sheet.write(row, column + 3,
+                        json_default(i['checkout_date']), body)
             sheet.write(row, column + 4, i['name'], body)
             sheet.write(row, column + 5, "{:.2f}".format(i['amount_total']),
                         body)
             row = row + 1
             value = value + 1
         workbook.close()
-        output.seek(0)
-        response.stream.write(output.read())
-        output.close()